@@ -0,0 +1,84 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from constants.cache_constants import AUTH_TOKEN_CACHE_TIMEOUT
+
+User = get_user_model()
+
+AUTH_CACHE_ALIAS = "auth"
+# Хеш пароля не кешируется, а счётчики меняются через queryset.update()
+# и не должны перезаписываться при save() пользователя из запроса
+UNCACHED_USER_FIELDS = {"password", "recipes_count", "subscribers_count"}
+
+
+def token_cache_key(key):
+    # Сам токен в ключ не попадает
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_tokens(keys):
+    """Убирает пользователей токенов из кеша аутентификации."""
+    caches[AUTH_CACHE_ALIAS].delete_many(
+        [token_cache_key(key) for key in keys]
+    )
+
+
+def cached_user_fields():
+    return [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.name not in UNCACHED_USER_FIELDS
+    ]
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication с кешем токен -> поля пользователя.
+
+    Кеш задаётся алиасом "auth" и должен быть общим для воркеров
+    (memcached, Redis); с DummyCache по умолчанию поля пользователя
+    читаются из базы на каждом запросе. Благодаря общему кешу выход,
+    удаление токена, смена пароля и блокировка сбрасывают его сразу
+    во всех процессах (см. api.signals).
+    Изменения в обход save() (queryset.update) применятся не позже чем
+    через AUTH_TOKEN_CACHE_TIMEOUT.
+
+    Пользователь собирается из кешированных полей, а пароль и счётчики
+    остаются отложенными: они загружаются при обращении, а save() без
+    update_fields их не перезаписывает.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = caches[AUTH_CACHE_ALIAS]
+        # Без настроенного кеша поведение как у TokenAuthentication
+        enabled = not isinstance(cache, DummyCache)
+        cache_key = token_cache_key(key)
+        values = cache.get(cache_key) if enabled else None
+        if values is None:
+            values = (
+                self.get_model().objects.filter(key=key)
+                .values(*(f"user__{name}" for name in cached_user_fields()))
+                .first()
+            )
+            if values is None:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            values = {
+                name[len("user__"):]: value for name, value in values.items()
+            }
+            if enabled:
+                cache.set(cache_key, values, AUTH_TOKEN_CACHE_TIMEOUT)
+
+        if not values["is_active"]:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        user = User.from_db(
+            DEFAULT_DB_ALIAS, list(values), list(values.values())
+        )
+        return user, self.get_model()(key=key, user=user)
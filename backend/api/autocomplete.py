@@ -0,0 +1,28 @@
+import hashlib
+
+from django.core.cache import cache
+
+from api.catalog import get_catalog
+from api.serializers import IngredientSerializer
+from constants.cache_constants import AUTOCOMPLETE_CACHE_TIMEOUT
+
+
+def autocomplete_ingredients(query, limit):
+    """Подсказки ингредиентов по началу или части названия.
+
+    Поиск идёт по индексу справочника в памяти процесса, ответы на частые
+    запросы кешируются.
+    """
+    catalog = get_catalog()
+    # Запрос хешируется: memcached не принимает пробелы и длинные ключи
+    key = (
+        f"ingredients:autocomplete:{catalog.version}:{limit}:"
+        + hashlib.md5(query.lower().encode()).hexdigest()
+    )
+    results = cache.get(key)
+    if results is None:
+        results = IngredientSerializer(
+            catalog.ingredient_index.search(query, limit), many=True
+        ).data
+        cache.set(key, results, AUTOCOMPLETE_CACHE_TIMEOUT)
+    return results
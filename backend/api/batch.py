@@ -0,0 +1,168 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from recipes.counters import count_subquery
+from recipes.models import (Favorite, FeedEntry, IngredientRecipe, Recipe,
+                            ShoppingCart, ShoppingListItem)
+from recipes.signals import deferred_signals
+from users.models import Subscription
+
+User = get_user_model()
+
+# Итоги по каждому id пачки
+CREATED = "created"
+EXISTS = "exists"
+DELETED = "deleted"
+MISSING = "missing"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+
+
+class BatchRelation:
+    """Пакетное создание и удаление связей пользователя с объектами.
+
+    Объекты и уже существующие связи проверяются одним запросом каждое,
+    строки вставляются и удаляются одним запросом. Обработчики сигналов
+    на это время отключены: счётчики и производные таблицы обновляются
+    в after_add() и after_remove() один раз на всю пачку.
+    """
+
+    model = None
+    target_model = None
+    field = None
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_invalid(self, ids):
+        """id, связь с которыми запрещена."""
+        return set()
+
+    def get_found(self, ids):
+        return set(
+            self.target_model.objects.filter(pk__in=ids).values_list(
+                "pk", flat=True
+            )
+        )
+
+    def get_existing(self, ids):
+        return set(
+            self.model.objects.filter(
+                user=self.user, **{f"{self.field}_id__in": ids}
+            ).values_list(f"{self.field}_id", flat=True)
+        )
+
+    def add(self, ids):
+        ids = list(dict.fromkeys(ids))
+        invalid = self.get_invalid(ids)
+        with transaction.atomic(), deferred_signals():
+            found = self.get_found(
+                [pk for pk in ids if pk not in invalid]
+            )
+            existing = self.get_existing(found)
+            created = [
+                pk for pk in ids if pk in found and pk not in existing
+            ]
+            self.model.objects.bulk_create(
+                [
+                    self.model(user=self.user, **{f"{self.field}_id": pk})
+                    for pk in created
+                ],
+                ignore_conflicts=True,
+            )
+            if created:
+                self.after_add(created)
+        return [
+            {
+                "id": pk,
+                "status": (
+                    INVALID if pk in invalid
+                    else NOT_FOUND if pk not in found
+                    else EXISTS if pk in existing
+                    else CREATED
+                ),
+            }
+            for pk in ids
+        ]
+
+    def remove(self, ids):
+        ids = list(dict.fromkeys(ids))
+        with transaction.atomic(), deferred_signals():
+            existing = self.get_existing(ids)
+            if existing:
+                self.model.objects.filter(
+                    user=self.user, **{f"{self.field}_id__in": existing}
+                ).delete()
+                self.after_remove(existing)
+        missing = [pk for pk in ids if pk not in existing]
+        found = self.get_found(missing) if missing else set()
+        return [
+            {
+                "id": pk,
+                "status": (
+                    DELETED if pk in existing
+                    else MISSING if pk in found
+                    else NOT_FOUND
+                ),
+            }
+            for pk in ids
+        ]
+
+    def after_add(self, ids):
+        pass
+
+    def after_remove(self, ids):
+        pass
+
+
+class FavoriteBatch(BatchRelation):
+    model = Favorite
+    target_model = Recipe
+    field = "recipe"
+
+    def recount(self, ids):
+        Recipe.objects.filter(pk__in=ids).update(
+            favorites_count=count_subquery(Favorite.objects.all(), "recipe")
+        )
+
+    after_add = after_remove = recount
+
+
+class ShoppingCartBatch(BatchRelation):
+    model = ShoppingCart
+    target_model = Recipe
+    field = "recipe"
+
+    def refresh(self, ids):
+        ShoppingListItem.objects.refresh(
+            [self.user.pk],
+            IngredientRecipe.objects.filter(recipe_id__in=ids).values(
+                "ingredient"
+            ),
+        )
+
+    after_add = after_remove = refresh
+
+
+class SubscriptionBatch(BatchRelation):
+    model = Subscription
+    target_model = User
+    field = "subscribed_to"
+
+    def get_invalid(self, ids):
+        return {self.user.pk}
+
+    def recount(self, ids):
+        User.objects.filter(pk__in=ids).update(
+            subscribers_count=count_subquery(
+                Subscription.objects.all(), "subscribed_to"
+            )
+        )
+
+    def after_add(self, ids):
+        self.recount(ids)
+        FeedEntry.objects.backfill(self.user.pk, ids)
+
+    def after_remove(self, ids):
+        self.recount(ids)
+        FeedEntry.objects.filter(user=self.user, author_id__in=ids).delete()
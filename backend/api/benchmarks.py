@@ -0,0 +1,133 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+
+from api.cache import bump_catalog_version
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+
+User = get_user_model()
+
+DEFAULT_REQUESTS = 1000
+
+
+def percentile(durations, share):
+    ordered = sorted(durations)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class BenchmarkCommand(BaseCommand):
+    """Основа команд замеров скорости API.
+
+    Данные для замеров создаются в транзакции, которая откатывается после
+    замеров, поэтому команду можно запускать на рабочей базе. Запросы
+    идут через тестовый клиент со всеми middleware, но без сети и
+    gunicorn.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=DEFAULT_REQUESTS,
+            help="Количество запросов в каждом замере",
+        )
+
+    def handle(self, *args, **options):
+        self.requests = options["requests"]
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            with transaction.atomic():
+                self.client = Client()
+                self.stdout.write(
+                    f"База данных: {connection.vendor}, "
+                    f"запросов в замере: {self.requests}"
+                )
+                self.stdout.write(
+                    f"{'Замер':<48} {'p50, мс':>9} {'p99, мс':>9} "
+                    f"{'запр./с':>9}"
+                )
+                self.benchmark(**options)
+                transaction.set_rollback(True)
+        # Справочники могли загрузиться с откаченными данными
+        bump_catalog_version()
+
+    def benchmark(self, **options):
+        raise NotImplementedError
+
+    def measure(self, label, request, warmup=10):
+        """Выполняет request self.requests раз и печатает задержки."""
+        for _ in range(warmup):
+            request()
+        durations = []
+        for _ in range(self.requests):
+            started = time.perf_counter()
+            request()
+            durations.append(time.perf_counter() - started)
+        self.stdout.write(
+            f"{label:<48} {percentile(durations, 0.5) * 1000:>9.3f} "
+            f"{percentile(durations, 0.99) * 1000:>9.3f} "
+            f"{1 / statistics.mean(durations):>9.0f}"
+        )
+        return durations
+
+    def get(self, path, **extra):
+        response = self.client.get(path, **extra)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path}: {response.status_code}")
+        return response
+
+    @staticmethod
+    def create_user(name):
+        return User.objects.create_user(
+            email=f"benchmark-{name}@example.com",
+            username=f"benchmark-{name}",
+            first_name=name,
+            last_name=name,
+            password="Benchmark123!",
+        )
+
+    @staticmethod
+    def create_recipes(author, count, tags=(), ingredients=()):
+        """Создаёт count рецептов автора с тегами и ингредиентами."""
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f"Рецепт {number}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/benchmark.png",
+            )
+            for number in range(count)
+        )
+        recipes = list(Recipe.objects.filter(author=author).order_by("pk"))
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe in recipes
+            for tag in tags
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=5)
+            for recipe in recipes
+            for ingredient in ingredients
+        )
+        return recipes
+
+    @staticmethod
+    def create_tags(count):
+        Tag.objects.bulk_create(
+            Tag(name=f"Замер {number}", slug=f"benchmark-{number}")
+            for number in range(count)
+        )
+        return list(
+            Tag.objects.filter(slug__startswith="benchmark-").order_by("pk")
+        )
+
+    @staticmethod
+    def create_ingredients(names):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г") for name in names
+        )
+        return list(Ingredient.objects.filter(name__in=names))
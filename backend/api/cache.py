@@ -0,0 +1,49 @@
+import time
+
+from django.core.cache import caches
+
+CATALOG_VERSION_KEY = "catalog:version"
+SHORT_LINKS_VERSION_KEY = "short_links:version"
+VERSION_CACHE_ALIAS = "shared"
+
+
+def get_catalog_version():
+    """Возвращает текущую версию справочников тегов и ингредиентов."""
+    version = caches[VERSION_CACHE_ALIAS].get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = bump_catalog_version()
+    return version
+
+
+def bump_catalog_version():
+    """Помечает справочники изменёнными.
+
+    Версия — момент изменения, поэтому её же можно отдавать клиенту как
+    время последней модификации.
+    """
+    version = time.time()
+    caches[VERSION_CACHE_ALIAS].set(CATALOG_VERSION_KEY, version, None)
+    return version
+
+
+def get_short_links_version():
+    """Возвращает версию коротких ссылок, меняющуюся при удалении рецептов."""
+    version = caches[VERSION_CACHE_ALIAS].get(SHORT_LINKS_VERSION_KEY)
+    if version is None:
+        version = bump_short_links_version()
+    return version
+
+
+def bump_short_links_version():
+    """Делает недействительными короткие ссылки в кешах всех процессов."""
+    version = time.time()
+    caches[VERSION_CACHE_ALIAS].set(SHORT_LINKS_VERSION_KEY, version, None)
+    return version
+
+
+def recipe_cache_key(recipe, catalog_version):
+    """Ключ представления рецепта, не зависящего от пользователя."""
+    return (
+        f"recipe:{recipe.pk}:{recipe.updated_at.timestamp()}:"
+        f"{catalog_version}"
+    )
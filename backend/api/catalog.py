@@ -0,0 +1,77 @@
+import threading
+from bisect import bisect_left
+from itertools import islice
+
+from api.cache import get_catalog_version
+from recipes.models import Ingredient, Tag
+
+
+class IngredientIndex:
+    """Отсортированный по названию индекс ингредиентов в памяти."""
+
+    def __init__(self, ingredients, version):
+        self.version = version
+        self.ingredients = sorted(
+            ingredients, key=lambda ingredient: ingredient.name.lower()
+        )
+        self.names = [
+            ingredient.name.lower() for ingredient in self.ingredients
+        ]
+
+    def search(self, query, limit=None):
+        """Ищет ингредиенты: сначала по началу названия, затем по вхождению.
+
+        Совпадения по началу находятся двоичным поиском, остальные —
+        проходом по списку, только если первых не хватило до limit.
+        """
+        query = query.lower()
+        start = bisect_left(self.names, query)
+        end = bisect_left(self.names, query + chr(0x10FFFF), start)
+        results = self.ingredients[start:end][:limit]
+        if limit is None or len(results) < limit:
+            substring_matches = (
+                ingredient
+                for ingredient, name in zip(self.ingredients, self.names)
+                if query in name and not name.startswith(query)
+            )
+            results += list(islice(
+                substring_matches,
+                None if limit is None else limit - len(results),
+            ))
+        return results
+
+
+class Catalog:
+    """Снимок тегов и ингредиентов, загруженный целиком в память."""
+
+    def __init__(self, version):
+        self.version = version
+        self.tags = {tag.pk: tag for tag in Tag.objects.order_by("id")}
+        self.ingredients = {
+            ingredient.pk: ingredient
+            for ingredient in Ingredient.objects.order_by("id")
+        }
+        self.ingredient_index = IngredientIndex(
+            self.ingredients.values(), version
+        )
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Возвращает справочники текущей версии.
+
+    Каждый воркер держит свою копию и перечитывает её из базы, только
+    когда общая метка версии изменилась.
+    """
+    global _catalog
+    version = get_catalog_version()
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        with _catalog_lock:
+            if _catalog is None or _catalog.version != version:
+                _catalog = Catalog(version)
+            catalog = _catalog
+    return catalog
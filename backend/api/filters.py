@@ -1,10 +1,42 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import (Case, Exists, F, FloatField, OuterRef, Q, Value,
+                              When)
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 
-from recipes.models import Ingredient, Recipe, Tag
+from constants.recipes_constants import SEARCH_CONFIG
+from recipes.models import Recipe, TagRecipe
 
 User = get_user_model()
 
+TAGS_MODE_ANY = "any"
+TAGS_MODE_ALL = "all"
+TAGS_MODES = (
+    (TAGS_MODE_ANY, "Любой из тегов"),
+    (TAGS_MODE_ALL, "Все теги"),
+)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Сортировка ?ordering= с полями view.ordering_tie_breaker в конце.
+
+    Без них порядок рецептов с равным значением (например, одинаковым
+    числом добавлений в избранное) не определён, и при переходе между
+    страницами рецепты повторяются или пропадают.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        used = {field.lstrip("-") for field in ordering}
+        return [*ordering, *(
+            field for field in getattr(view, "ordering_tie_breaker", ())
+            if field.lstrip("-") not in used
+        )]
+
 
 class RecipeFilter(filters.FilterSet):
     """Фильтр рецептов."""
@@ -14,15 +46,45 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart"
     )
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name="tags__slug",
-        to_field_name="slug",
-        queryset=Tag.objects.all(),
+    # Слаги не проверяются по таблице тегов: несуществующий слаг просто
+    # ничего не находит
+    tags = filters.CharFilter(method="filter_tags")
+    tags_mode = filters.ChoiceFilter(
+        choices=TAGS_MODES, method="filter_tags_mode"
     )
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Recipe
-        fields = ["author", "tags", "is_favorited", "is_in_shopping_cart"]
+        fields = [
+            "author",
+            "tags",
+            "tags_mode",
+            "is_favorited",
+            "is_in_shopping_cart",
+            "search",
+        ]
+
+    def filter_tags(self, queryset, name, value):
+        """Рецепты с любым из тегов или, при ?tags_mode=all, со всеми.
+
+        Каждое условие — EXISTS по TagRecipe, поэтому строки рецептов не
+        размножаются соединением и DISTINCT не нужен.
+        """
+        slugs = set(self.data.getlist(name))
+        if self.form.cleaned_data.get("tags_mode") == TAGS_MODE_ALL:
+            for slug in slugs:
+                queryset = queryset.filter(Exists(TagRecipe.objects.filter(
+                    recipe=OuterRef("pk"), tag__slug=slug
+                )))
+            return queryset
+        return queryset.filter(Exists(TagRecipe.objects.filter(
+            recipe=OuterRef("pk"), tag__slug__in=slugs
+        )))
+
+    def filter_tags_mode(self, queryset, name, value):
+        # Режим учитывается в filter_tags
+        return queryset
 
     def filter_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
@@ -34,12 +96,23 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(shoppingcart__user=self.request.user)
         return queryset
 
-
-class IngredientFilter(filters.FilterSet):
-    """Фильтр ингредиентов."""
-
-    name = filters.CharFilter(lookup_expr="icontains")
-
-    class Meta:
-        model = Ingredient
-        fields = ["name"]
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию и описанию, самые релевантные первыми."""
+        if connection.vendor == "postgresql":
+            query = SearchQuery(
+                value, config=SEARCH_CONFIG, search_type="websearch"
+            )
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=SearchRank(F("search_vector"), query)
+            )
+        else:
+            queryset = queryset.filter(
+                Q(name__icontains=value) | Q(text__icontains=value)
+            ).annotate(
+                rank=Case(
+                    When(name__icontains=value, then=Value(1.0)),
+                    default=Value(0.5),
+                    output_field=FloatField(),
+                )
+            )
+        return queryset.order_by("-rank", "-pub_date", "-id")
@@ -0,0 +1,79 @@
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api.authentication import AUTH_CACHE_ALIAS, CachedTokenAuthentication
+from api.benchmarks import BenchmarkCommand
+from api.views import RecipeViewSet, UserGetViewSet
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+FILE_BACKEND = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Замер задержки запросов с токеном: TokenAuthentication против "
+        "CachedTokenAuthentication с разными бэкендами кеша"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--backend",
+            action="append",
+            default=[],
+            metavar="BACKEND[=LOCATION]",
+            help="Дополнительный бэкенд кеша для сравнения (можно повторять)",
+        )
+
+    def benchmark(self, **options):
+        user = self.create_user("auth")
+        recipe = self.create_recipes(user, 1)[0]
+        token = Token.objects.create(user=user)
+        header = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+        paths = (
+            "/api/users/me/",
+            f"/api/recipes/{recipe.pk}/get-link/",
+        )
+
+        configured = settings.CACHES[AUTH_CACHE_ALIAS]["BACKEND"]
+        file_location = tempfile.mkdtemp(prefix="foodgram_auth_benchmark_")
+        backends = [
+            (configured, settings.CACHES[AUTH_CACHE_ALIAS].get("LOCATION")),
+            (LOCMEM_BACKEND, "benchmark"),
+            (FILE_BACKEND, file_location),
+        ]
+        for backend in options["backend"]:
+            name, _, location = backend.partition("=")
+            backends.append((name, location))
+
+        for path in paths:
+            self.run_variant(
+                f"Token {path}", TokenAuthentication, path, header
+            )
+            for backend, location in backends:
+                caches = dict(settings.CACHES)
+                caches[AUTH_CACHE_ALIAS] = {
+                    "BACKEND": backend, "LOCATION": location or ""
+                }
+                with override_settings(CACHES=caches):
+                    self.run_variant(
+                        f"Cached {backend.rsplit('.', 1)[-1]} {path}",
+                        CachedTokenAuthentication,
+                        path,
+                        header,
+                    )
+
+    def run_variant(self, label, authentication_class, path, header):
+        views = (UserGetViewSet, RecipeViewSet)
+        original = [view.authentication_classes for view in views]
+        for view in views:
+            view.authentication_classes = (authentication_class,)
+        try:
+            self.measure(label, lambda: self.get(path, **header))
+        finally:
+            for view, classes in zip(views, original):
+                view.authentication_classes = classes
@@ -0,0 +1,57 @@
+import itertools
+import random
+
+from django.core.cache import cache
+
+from api.benchmarks import BenchmarkCommand
+from api.cache import bump_catalog_version
+
+SYLLABLES = (
+    "ба", "ва", "го", "да", "ке", "ли", "ма", "но", "па", "ро", "са", "ту",
+    "фа", "ха", "це", "ша", "я", "ук", "ор", "ин",
+)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Замер подсказок ингредиентов для запросов из 1–3 символов: поиск "
+        "по индексу в памяти и ответ из кеша"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--ingredients",
+            type=int,
+            default=2000,
+            help="Количество ингредиентов в справочнике",
+        )
+
+    def benchmark(self, **options):
+        generator = random.Random(0)
+        names = [
+            "".join(generator.choices(SYLLABLES, k=3)) + f" {number}"
+            for number in range(options["ingredients"])
+        ]
+        self.create_ingredients(names)
+        bump_catalog_version()
+
+        for length in (1, 2, 3):
+            queries = sorted({name[:length] for name in names})
+            paths = [
+                f"/api/ingredients/autocomplete/?name={query}"
+                for query in queries
+            ]
+            cycle = itertools.cycle(paths)
+
+            def search():
+                # Без ответа в кеше подсказки ищутся по индексу справочника
+                cache.clear()
+                self.get(next(cycle))
+
+            self.measure(f"Индекс в памяти, {length} симв.", search)
+            for path in paths:
+                self.get(path)
+            self.measure(
+                f"Кеш, {length} симв.", lambda: self.get(next(cycle))
+            )
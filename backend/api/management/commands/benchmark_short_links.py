@@ -0,0 +1,44 @@
+import itertools
+
+from api.benchmarks import BenchmarkCommand
+from api.short_links import short_link_cache
+from recipes.models import Recipe
+from recipes.short_links import encode_short_link
+
+
+class Command(BenchmarkCommand):
+    help = "Замер пропускной способности перенаправлений /s/<code>/"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--recipes",
+            type=int,
+            default=1000,
+            help="Количество рецептов, по ссылкам которых идут запросы",
+        )
+
+    def benchmark(self, **options):
+        recipes = self.create_recipes(
+            self.create_user("short-links"), options["recipes"]
+        )
+        for recipe in recipes:
+            recipe.short_link = encode_short_link(recipe.pk)
+        Recipe.objects.bulk_update(recipes, ["short_link"], batch_size=1000)
+        paths = itertools.cycle(
+            f"/s/{recipe.short_link}/" for recipe in recipes
+        )
+
+        def redirect():
+            response = self.client.get(next(paths))
+            if response.status_code != 302:
+                raise RuntimeError(f"Ответ {response.status_code}")
+
+        def uncached_redirect():
+            short_link_cache.data.clear()
+            redirect()
+
+        self.measure("Без кеша (запрос к базе)", uncached_redirect)
+        short_link_cache.data.clear()
+        self.measure("Кеш в памяти процесса", redirect)
+        short_link_cache.data.clear()
@@ -0,0 +1,51 @@
+import random
+
+from api.benchmarks import BenchmarkCommand
+from api.cache import bump_catalog_version
+from api.filters import TAGS_MODE_ALL, TAGS_MODE_ANY
+from recipes.models import TagRecipe
+
+TAGS = 6
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Замер списка рецептов с фильтром по 1, 3 и 6 тегам в режимах "
+        "any и all"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--recipes",
+            type=int,
+            default=5000,
+            help="Количество рецептов",
+        )
+
+    def benchmark(self, **options):
+        tags = self.create_tags(TAGS)
+        recipes = self.create_recipes(
+            self.create_user("tags"), options["recipes"]
+        )
+        # У каждого рецепта около половины тегов, поэтому и в режиме all
+        # по шести тегам что-то находится
+        generator = random.Random(0)
+        TagRecipe.objects.bulk_create(
+            (
+                TagRecipe(recipe=recipe, tag=tag)
+                for recipe in recipes
+                for tag in tags
+                if generator.random() < 0.5
+            ),
+            batch_size=1000,
+        )
+        bump_catalog_version()
+
+        for count in (1, 3, 6):
+            query = "&".join(f"tags={tag.slug}" for tag in tags[:count])
+            for mode in (TAGS_MODE_ANY, TAGS_MODE_ALL):
+                path = f"/api/recipes/?{query}&tags_mode={mode}"
+                self.measure(
+                    f"{count} тег., режим {mode}", lambda: self.get(path)
+                )
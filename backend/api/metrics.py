@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import StreamingHttpResponse
+
+from constants.metrics_constants import (DURATION_BUCKETS, QUERY_COUNT_BUCKETS,
+                                         RESPONSE_SIZE_BUCKETS)
+
+UNRESOLVED_ROUTE = ("unresolved", "")
+
+
+class Histogram:
+    """Накопительная гистограмма в формате Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        for bound, count in zip(self.buckets, self.counts):
+            yield sample(f"{name}_bucket", labels, count, le=bound)
+        yield sample(f"{name}_bucket", labels, self.count, le="+Inf")
+        yield sample(f"{name}_sum", labels, self.sum)
+        yield sample(f"{name}_count", labels, self.count)
+
+
+def escape(value):
+    return (
+        str(value).replace("\\", "\\\\").replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def sample(name, labels, value, **extra):
+    pairs = ",".join(
+        f'{key}="{escape(label)}"'
+        for key, label in (*labels.items(), *extra.items())
+    )
+    return f"{name}{{{pairs}}} {value}"
+
+
+class RouteStats:
+    """Метрики одного маршрута: вьюсета и его действия."""
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.response_size = Histogram(RESPONSE_SIZE_BUCKETS)
+        self.sql_duration = 0
+        self.responses = defaultdict(int)
+
+
+class MetricsRegistry:
+    """Метрики запросов, накопленные в памяти процесса.
+
+    У каждого воркера gunicorn свои метрики, Prometheus суммирует их
+    по экземплярам.
+    """
+
+    METRICS = (
+        ("request_duration_seconds", "histogram",
+         "Длительность обработки запроса."),
+        ("request_sql_queries", "histogram",
+         "Количество SQL-запросов на запрос."),
+        ("response_size_bytes", "histogram",
+         "Размер тела ответа, без потоковых ответов."),
+        ("sql_duration_seconds_total", "counter",
+         "Суммарное время выполнения SQL-запросов."),
+        ("requests_total", "counter",
+         "Количество запросов по методу и коду ответа."),
+    )
+
+    def __init__(self, prefix="foodgram_http_"):
+        self.prefix = prefix
+        self.routes = defaultdict(RouteStats)
+        self.lock = threading.Lock()
+
+    def observe(self, route, method, status_code, duration, queries,
+                sql_duration, size):
+        with self.lock:
+            stats = self.routes[route]
+            stats.duration.observe(duration)
+            stats.queries.observe(queries)
+            if size is not None:
+                stats.response_size.observe(size)
+            stats.sql_duration += sql_duration
+            stats.responses[method, status_code] += 1
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = []
+            for suffix, kind, help_text in self.METRICS:
+                name = self.prefix + suffix
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (view, action), stats in routes:
+                    labels = {"view": view, "action": action}
+                    lines.extend(self.render_route(
+                        suffix, name, labels, stats
+                    ))
+        return "\n".join(lines) + "\n"
+
+    def render_route(self, suffix, name, labels, stats):
+        if suffix == "request_duration_seconds":
+            yield from stats.duration.render(name, labels)
+        elif suffix == "request_sql_queries":
+            yield from stats.queries.render(name, labels)
+        elif suffix == "response_size_bytes":
+            if stats.response_size.count:
+                yield from stats.response_size.render(name, labels)
+        elif suffix == "sql_duration_seconds_total":
+            yield sample(name, labels, stats.sql_duration)
+        else:
+            for (method, status_code), count in sorted(
+                stats.responses.items()
+            ):
+                yield sample(
+                    name, labels, count, method=method, status=status_code
+                )
+
+
+metrics = MetricsRegistry()
+
+
+def resolve_route(request):
+    """Вьюсет и действие запроса вместо пути с идентификаторами."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED_ROUTE
+    view = getattr(match.func, "cls", None)
+    if view is None:
+        return match.view_name or match.func.__name__, ""
+    actions = getattr(match.func, "actions", None) or {}
+    return view.__name__, actions.get(request.method.lower(), "")
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, считающая запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов по маршрутам.
+
+    При METRICS_ENABLED = False middleware исключается из цепочки при
+    запуске и не добавляет накладных расходов. SQL потоковых ответов,
+    выполняемый при отдаче тела, не учитывается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        if isinstance(response, StreamingHttpResponse):
+            size = None
+        else:
+            size = len(response.content)
+        metrics.observe(
+            resolve_route(request),
+            request.method,
+            response.status_code,
+            duration,
+            counter.count,
+            counter.duration,
+            size,
+        )
+        return response
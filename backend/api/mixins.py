@@ -0,0 +1,75 @@
+import hashlib
+
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+
+
+class NotModified(Exception):
+    """Прерывает обработку запроса готовым ответом 304."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Условные GET-запросы: ETag, Last-Modified и ответ 304.
+
+    Валидаторы считаются после аутентификации, но до сериализации тела,
+    поэтому неизменившийся ответ не собирается вовсе.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    # Заголовки запроса, от которых зависит ответ
+    conditional_vary = ()
+
+    def get_etag_data(self, request):
+        """Строка, меняющаяся вместе с телом ответа, или None."""
+        return None
+
+    def get_last_modified(self, request):
+        """Время последнего изменения ответа (timestamp) или None."""
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if (
+            request.method not in ("GET", "HEAD")
+            or self.action not in self.conditional_actions
+        ):
+            return
+        etag_data = self.get_etag_data(request)
+        if etag_data is not None:
+            self.etag = quote_etag(
+                hashlib.md5(etag_data.encode()).hexdigest()
+            )
+        last_modified = self.get_last_modified(request)
+        if last_modified is not None:
+            self.last_modified = int(last_modified)
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if response.status_code in (200, 304):
+            etag = getattr(self, "etag", None)
+            last_modified = getattr(self, "last_modified", None)
+            if etag is not None:
+                response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        if self.conditional_vary:
+            patch_vary_headers(response, self.conditional_vary)
+        return response
@@ -1,4 +1,12 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from constants.pagination_constants import MAX_PAGE_SIZE
 
@@ -15,3 +23,92 @@ class FoodgramPagination(PageNumberPagination):
             return min(limit, self.MAX_PAGE_SIZE)
         except ValueError:
             return self.page_size
+
+
+class RecipePagination(FoodgramPagination):
+    """Постраничная пагинация либо курсорная через ?cursor=.
+
+    В курсорном режиме страницы выбираются по ключу (pub_date, id) без
+    OFFSET и без подсчёта общего количества, поэтому скорость не зависит
+    от глубины прокрутки. Первая страница запрашивается с пустым ?cursor=.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_fields = ("pub_date", "id")
+    invalid_cursor_message = "Неверный курсор."
+    # Только курсорный режим, без номеров страниц
+    cursor_only = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_only
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        # Курсору нужен последний элемент страницы
+        page_size = max(self.get_page_size(request), 1)
+        date_field, id_field = self.cursor_fields
+        queryset = queryset.order_by(f"-{date_field}", f"-{id_field}")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position_date, position_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f"{date_field}__lt": position_date})
+                | Q(**{
+                    date_field: position_date,
+                    f"{id_field}__lt": position_id,
+                })
+            )
+
+        # Лишний элемент показывает, есть ли следующая страница
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        date_field, id_field = self.cursor_fields
+        last = self.page[-1]
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(
+                getattr(last, date_field), getattr(last, id_field)
+            ),
+        )
+
+    def encode_cursor(self, position_date, position_id):
+        value = f"{position_date.isoformat()}|{position_id}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            position_date, position_id = value.split("|")
+            position_date = parse_datetime(position_date)
+            position_id = int(position_id)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if position_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position_date, position_id
+
+
+class FeedPagination(RecipePagination):
+    """Курсорная пагинация ленты подписок по ключу (pub_date, recipe_id)."""
+
+    cursor_fields = ("pub_date", "recipe_id")
+    cursor_only = True
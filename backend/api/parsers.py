@@ -0,0 +1,43 @@
+import json
+
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, DataAndFiles, MultiPartParser
+
+from constants.image_constants import UPLOAD_CHUNK_MAX_SIZE
+
+
+class MultipartJsonParser(MultiPartParser):
+    """multipart/form-data: JSON в части data и файлы в остальных частях.
+
+    Так вложенные поля рецепта (теги, ингредиенты) передаются вместе
+    с картинкой без кодирования её в base64.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        if "data" not in result.data:
+            return result
+        try:
+            data = json.loads(result.data["data"])
+        except ValueError as error:
+            raise ParseError(f"Некорректный JSON в части data: {error}")
+        if not isinstance(data, dict):
+            raise ParseError("В части data ожидается JSON-объект.")
+        data.update(result.files.items())
+        # Файлы уже в data: Request.data иначе добавит их как списки
+        return DataAndFiles(data, MultiValueDict())
+
+
+class ChunkParser(BaseParser):
+    """Тело запроса как есть — очередная часть загружаемого файла."""
+
+    media_type = "application/offset+octet-stream"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        chunk = stream.read(UPLOAD_CHUNK_MAX_SIZE + 1)
+        if len(chunk) > UPLOAD_CHUNK_MAX_SIZE:
+            raise ParseError(
+                f"Часть не должна превышать {UPLOAD_CHUNK_MAX_SIZE} байт."
+            )
+        return chunk
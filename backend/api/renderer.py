@@ -1,5 +1,10 @@
+import csv
+import json
+
 from rest_framework.renderers import BaseRenderer
 
+from constants.recipes_constants import SHOPPING_LIST_PAGE_LINES
+
 
 class PlainTextRenderer(BaseRenderer):
     """Конвертирует данные в plain text format."""
@@ -7,6 +12,7 @@ class PlainTextRenderer(BaseRenderer):
     media_type = "text/plain"
     format = "txt"
     charset = "utf-8"
+    extension = "txt"
 
     def render(self, data, media_type=None, renderer_context=None):
         if isinstance(data, dict):
@@ -14,3 +20,80 @@ class PlainTextRenderer(BaseRenderer):
         elif isinstance(data, list):
             data = "\n".join(data)
         return data.encode(self.charset)
+
+    def stream(self, rows):
+        """Построчно отдаёт список покупок."""
+        for row in rows:
+            yield (
+                f"{row['name']} - {row['total']}"
+                f"({row['measurement_unit']})\n"
+            )
+
+
+class EchoBuffer:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(PlainTextRenderer):
+    """Список покупок в формате CSV."""
+
+    media_type = "text/csv"
+    format = "csv"
+    extension = "csv"
+
+    def stream(self, rows):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(("name", "measurement_unit", "amount"))
+        for row in rows:
+            yield writer.writerow(
+                (row["name"], row["measurement_unit"], row["total"])
+            )
+
+
+class ShoppingListJSONRenderer(PlainTextRenderer):
+    """Список покупок в формате JSON."""
+
+    media_type = "application/json"
+    format = "json"
+    extension = "json"
+
+    def render(self, data, media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+    def stream(self, rows):
+        separator = "["
+        for row in rows:
+            yield separator + json.dumps(
+                {
+                    "name": row["name"],
+                    "measurement_unit": row["measurement_unit"],
+                    "amount": row["total"],
+                },
+                ensure_ascii=False,
+            )
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+
+class PrintableTextRenderer(PlainTextRenderer):
+    """Список покупок, разбитый на страницы для печати."""
+
+    format = "print"
+
+    def stream(self, rows):
+        page = 0
+        for number, row in enumerate(rows, start=1):
+            if number % SHOPPING_LIST_PAGE_LINES == 1:
+                page += 1
+                # Символ перевода страницы перед каждой следующей страницей
+                yield (
+                    f"{chr(12) if page > 1 else ''}"
+                    f"Список покупок — страница {page}\n\n"
+                )
+            yield (
+                f"{number:>4}. [ ] {row['name']:<48} "
+                f"{row['total']:>8} {row['measurement_unit']}\n"
+            )
@@ -1,44 +1,188 @@
 import base64
+import binascii
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
-from django.db.models import Count, Exists
+from django.core.cache import cache
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import models, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from djoser.serializers import TokenCreateSerializer, UserSerializer
 from rest_framework import serializers
 
-from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+from api.cache import get_catalog_version, recipe_cache_key
+from api.catalog import get_catalog
+from api.uploads import UPLOAD_TOKEN_PREFIX, ChunkedUpload
+from constants.cache_constants import RECIPE_CACHE_TIMEOUT
+from constants.image_constants import BASE64_CHUNK_SIZE, IMAGE_MAX_SIZE
+from constants.recipes_constants import BATCH_MAX_SIZE
+from foodgram_backend.storage import delete_on_commit
+from recipes.models import (Ingredient, IngredientRecipe, Recipe, ShoppingCart,
+                            ShoppingListItem, Tag, TagRecipe)
+from recipes.thumbnails import schedule_thumbnails
 from users.models import Subscription
 
 User = get_user_model()
 
 
-def add_tags_and_ingredients(recipe, ingredients_data, tags_data):
-    """Работает с тегами и ингредиентами при create/update рецепта."""
-    recipe.tags.set(tags_data)
+def add_tags_and_ingredients(recipe, ingredients_data, tags_data,
+                             created=False):
+    """Работает с тегами и ингредиентами при create/update рецепта.
 
-    for ingredient in ingredients_data:
-        current_ingredient = ingredient["id"]
+    Новый набор сравнивается с уже сохранённым, и разница записывается
+    пакетными запросами. Возвращает id ингредиентов, которые были
+    добавлены, удалены или изменили количество.
+    """
+    current_tags = set() if created else set(
+        TagRecipe.objects.filter(recipe=recipe).values_list("tag", flat=True)
+    )
+    new_tags = {tag.id for tag in tags_data}
+    if current_tags - new_tags:
+        TagRecipe.objects.filter(
+            recipe=recipe, tag_id__in=current_tags - new_tags
+        ).delete()
+    TagRecipe.objects.bulk_create(
+        TagRecipe(recipe=recipe, tag_id=tag_id)
+        for tag_id in new_tags - current_tags
+    )
 
-        IngredientRecipe.objects.update_or_create(
+    current_ingredients = {} if created else {
+        item.ingredient_id: item
+        for item in IngredientRecipe.objects.filter(recipe=recipe)
+    }
+    new_amounts = {
+        ingredient["id"].id: ingredient["amount"]
+        for ingredient in ingredients_data
+    }
+    removed = current_ingredients.keys() - new_amounts.keys()
+    changed = [
+        item for ingredient_id, item in current_ingredients.items()
+        if ingredient_id in new_amounts
+        and item.amount != new_amounts[ingredient_id]
+    ]
+    for item in changed:
+        item.amount = new_amounts[item.ingredient_id]
+    added = new_amounts.keys() - current_ingredients.keys()
+
+    if removed:
+        IngredientRecipe.objects.filter(
+            recipe=recipe, ingredient_id__in=removed
+        ).delete()
+    if changed:
+        IngredientRecipe.objects.bulk_update(changed, ["amount"])
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(
             recipe=recipe,
-            ingredient=current_ingredient,
-            amount=ingredient["amount"],
+            ingredient_id=ingredient_id,
+            amount=new_amounts[ingredient_id],
         )
+        for ingredient_id in added
+    )
+    return removed | added | {item.ingredient_id for item in changed}
+
+
+def media_url(file):
+    """Полный адрес загруженного файла или None."""
+    if not file:
+        return None
+    return f"{settings.BASE_URL}{file.url}"
+
+
+class DecodedImageFile(TemporaryUploadedFile):
+    """Временный файл с декодированным изображением.
+
+    Хранилище перемещает такой файл при сохранении, а close() загруженного
+    файла это учитывает, поэтому закрываем его явно и при сборке мусора.
+    """
+
+    def __del__(self):
+        self.close()
 
 
 class Base64ImageField(serializers.ImageField):
-    """Декодирует изображение из base64."""
+    """Изображение в base64, файлом multipart или токеном загрузки.
+
+    Размер base64 проверяется по длине строки до декодирования, а строка
+    декодируется частями во временный файл на диске, а не целиком в память.
+    Токен "upload:<token>" ссылается на файл, загруженный частями через
+    /api/uploads/.
+    """
+
+    default_error_messages = {
+        "too_large": "Размер изображения не должен превышать {max_size} МБ.",
+        "invalid_base64": "Некорректное изображение в base64.",
+        "invalid_upload": "Загрузка не найдена или устарела.",
+        "incomplete_upload": "Загрузка ещё не завершена.",
+    }
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
+            format, _, imgstr = data.partition(";base64,")
             ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
+            data = self.decode(imgstr, ext)
+        elif isinstance(data, str) and data.startswith(UPLOAD_TOKEN_PREFIX):
+            data = self.from_upload(data[len(UPLOAD_TOKEN_PREFIX):])
 
+        if getattr(data, "size", 0) > IMAGE_MAX_SIZE:
+            self.fail("too_large", max_size=IMAGE_MAX_SIZE // (1024 * 1024))
         return super().to_internal_value(data)
 
+    def from_upload(self, token):
+        request = self.context.get("request")
+        upload = request and ChunkedUpload.get(token, request.user)
+        if not upload:
+            self.fail("invalid_upload")
+        if not upload.complete:
+            self.fail("incomplete_upload")
+        return upload.as_file()
+
+    def decode(self, imgstr, ext):
+        max_size = IMAGE_MAX_SIZE // (1024 * 1024)
+        # Строка с переносами длиннее, но не вдвое: заведомо большую
+        # отклоняем до копирования
+        if len(imgstr) // 4 * 3 > IMAGE_MAX_SIZE * 2:
+            self.fail("too_large", max_size=max_size)
+        # Переносы строк допустимы (base64.encodebytes, MIME)
+        imgstr = "".join(imgstr.split())
+        # Каждые 4 символа base64 кодируют 3 байта
+        if len(imgstr) // 4 * 3 > IMAGE_MAX_SIZE:
+            self.fail("too_large", max_size=max_size)
+        file = DecodedImageFile("temp." + ext, f"image/{ext}", 0, None)
+        try:
+            for start in range(0, len(imgstr), BASE64_CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    imgstr[start:start + BASE64_CHUNK_SIZE], validate=True
+                ))
+        except binascii.Error:
+            file.close()
+            self.fail("invalid_base64")
+        file.size = file.tell()
+        file.seek(0)
+        return file
+
+
+class CatalogPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связь по первичному ключу, проверяемая по справочнику в памяти.
+
+    queryset нужен только browsable API для списка вариантов.
+    """
+
+    def __init__(self, catalog_attr, **kwargs):
+        self.catalog_attr = catalog_attr
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = getattr(get_catalog(), self.catalog_attr).get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
 
 class TokenLoginSerializer(TokenCreateSerializer):
     """Сериализатор для входа и получения токена."""
@@ -69,6 +213,9 @@ class NewUserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            # Значение уже получено одним запросом вместе со списком
+            return obj.is_subscribed
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return Subscription.objects.filter(
@@ -126,6 +273,15 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Сериализует список рецептов через общий кеш представлений."""
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        return self.child.cached_representation(list(data))
+
+
 class RecipeReadSerializer(serializers.ModelSerializer):
     """Сериализатор для чтения модели рецептов."""
 
@@ -148,22 +304,82 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_small",
+            "image_medium",
             "text",
             "cooking_time",
         )
+        list_serializer_class = RecipeListSerializer
 
     def to_representation(self, instance):
+        return self.cached_representation([instance])[0]
+
+    def cached_representation(self, recipes):
+        """Собирает представления рецептов, используя кеш.
+
+        В кеше хранится общая для всех пользователей часть; признаки
+        избранного, корзины и подписки на автора берутся из аннотаций
+        запроса и накладываются поверх.
+        """
+        catalog_version = get_catalog_version()
+        keys = {
+            recipe.pk: recipe_cache_key(recipe, catalog_version)
+            for recipe in recipes
+        }
+        representations = cache.get_many(keys.values())
+        missing = [
+            recipe for recipe in recipes
+            if keys[recipe.pk] not in representations
+        ]
+        if missing:
+            prefetch_related_objects(
+                missing,
+                Prefetch(
+                    "recipe_ingredients",
+                    queryset=IngredientRecipe.objects.select_related(
+                        "ingredient"
+                    ),
+                ),
+                "tags",
+            )
+            fresh = {
+                keys[recipe.pk]: self.base_representation(recipe)
+                for recipe in missing
+            }
+            cache.set_many(fresh, RECIPE_CACHE_TIMEOUT)
+            representations.update(fresh)
+
+        result = []
+        for recipe in recipes:
+            representation = representations[keys[recipe.pk]]
+            representation["is_favorited"] = getattr(
+                recipe, "is_favorited", False
+            )
+            representation["is_in_shopping_cart"] = getattr(
+                recipe, "is_in_shopping_cart", False
+            )
+            representation["author"]["is_subscribed"] = getattr(
+                recipe, "author_is_subscribed", False
+            )
+            result.append(representation)
+        return result
+
+    def base_representation(self, instance):
+        instance.author.is_subscribed = getattr(
+            instance, "author_is_subscribed", False
+        )
         representation = super().to_representation(instance)
-        if instance.image:
-            image_url = instance.image.url
-            representation["image"] = f"{settings.BASE_URL}{image_url}"
+        for field in ("image", "image_small", "image_medium"):
+            representation[field] = media_url(getattr(instance, field))
         return representation
 
 
 class IngredientRecipeWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для записи игредиентов в рецепте."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = CatalogPrimaryKeyRelatedField(
+        "ingredients", queryset=Ingredient.objects.all()
+    )
 
     class Meta:
         model = IngredientRecipe
@@ -173,7 +389,8 @@ class IngredientRecipeWriteSerializer(serializers.ModelSerializer):
 class RecipeIWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для записи модели рецептов."""
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CatalogPrimaryKeyRelatedField(
+        "tags",
         queryset=Tag.objects.all(),
         many=True,
         required=True,
@@ -262,25 +479,48 @@ class RecipeIWriteSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         tags_data = validated_data.pop("tags")
         author = self.context["request"].user
         recipe = Recipe.objects.create(author=author, **validated_data)
 
-        add_tags_and_ingredients(recipe, ingredients_data, tags_data)
+        add_tags_and_ingredients(
+            recipe, ingredients_data, tags_data, created=True
+        )
+        schedule_thumbnails(recipe)
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if "image" in validated_data:
+            delete_on_commit([
+                instance.image.name,
+                instance.image_small.name,
+                instance.image_medium.name,
+            ])
             instance.image = validated_data.pop("image")
+            instance.image_small = instance.image_medium = ""
 
         ingredients_data = validated_data.pop("ingredients")
         tags_data = validated_data.pop("tags")
-        add_tags_and_ingredients(instance, ingredients_data, tags_data)
+        changed_ingredients = add_tags_and_ingredients(
+            instance, ingredients_data, tags_data
+        )
+        if changed_ingredients:
+            ShoppingListItem.objects.refresh(
+                ShoppingCart.objects.filter(recipe=instance).values_list(
+                    "user", flat=True
+                ),
+                changed_ingredients,
+            )
 
-        return super().update(instance, validated_data)
+        recipe = super().update(instance, validated_data)
+        if not recipe.image_small:
+            schedule_thumbnails(recipe)
+        return recipe
 
     def to_representation(self, instance):
         """Метод для возвращения данных, как при GET запросе."""
@@ -293,73 +533,49 @@ class RecipeRepresentation(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = (
+            "id", "name", "image", "image_small", "image_medium",
+            "cooking_time",
+        )
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        if instance.image:
-            image_url = instance.image.url
-            representation["image"] = f"{settings.BASE_URL}{image_url}"
+        for field in ("image", "image_small", "image_medium"):
+            representation[field] = media_url(getattr(instance, field))
         return representation
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
-    """Сериализатор корзины с рецептами."""
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Сериализатор позиции списка покупок."""
 
-    recipe = serializers.PrimaryKeyRelatedField(
-        queryset=Recipe.objects.all()
+    id = serializers.IntegerField(source="ingredient.id")
+    name = serializers.CharField(source="ingredient.name")
+    measurement_unit = serializers.CharField(
+        source="ingredient.measurement_unit"
     )
 
     class Meta:
-        model = ShoppingCart
-        fields = ("recipe",)
-
-    def create(self, validated_data):
-        user = self.context["request"].user
-        recipe = validated_data["recipe"]
-        cart_item, created = ShoppingCart.objects.get_or_create(
-            user=user, recipe=recipe
-        )
-        if not created:
-            raise serializers.ValidationError(
-                "Рецепт уже есть в списке покупок."
-            )
-        return cart_item
-
-    def to_representation(self, instance):
-        recipe = instance.recipe
-        serializer = RecipeRepresentation(recipe)
-        return serializer.data
-
-
-class FavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор рецептов в Избранное."""
+        model = ShoppingListItem
+        fields = ("id", "name", "measurement_unit", "amount")
 
-    class Meta:
-        model = Favorite
-        fields = ("recipe",)
 
-    def create(self, validated_data):
-        user = self.context["request"].user
-        recipe = validated_data["recipe"]
-        fav_item, created = Favorite.objects.get_or_create(
-            user=user, recipe=recipe
-        )
-        if not created:
-            raise serializers.ValidationError("Рецепт уже есть в Избранном.")
-        return fav_item
+class SubscriptionListSerializer(serializers.ListSerializer):
+    """Список подписок с рецептами всех авторов страницы одним запросом."""
 
-    def to_representation(self, instance):
-        recipe = instance.recipe
-        serializer = RecipeRepresentation(recipe)
-        return serializer.data
+    def to_representation(self, data):
+        authors = list(data)
+        self.child.attach_recipes(authors)
+        return super().to_representation(authors)
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
-    """Сериализатор для отображения подписок."""
+    """Сериализатор для отображения подписок.
+
+    Количество рецептов автора ограничивается параметром recipes_limit.
+    """
 
     is_subscribed = serializers.BooleanField()
-    recipes = RecipeRepresentation(many=True)
+    recipes = RecipeRepresentation(many=True, source="latest_recipes")
     recipes_count = serializers.IntegerField()
 
     class Meta:
@@ -375,8 +591,29 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             "recipes_count",
             "avatar",
         )
+        list_serializer_class = SubscriptionListSerializer
+
+    def get_recipes_limit(self):
+        request = self.context.get("request")
+        if request is None:
+            return None
+        try:
+            limit = int(request.query_params["recipes_limit"])
+        except (KeyError, ValueError):
+            return None
+        return max(limit, 0)
+
+    def attach_recipes(self, authors):
+        """Добавляет авторам новейшие рецепты в latest_recipes."""
+        recipes = Recipe.objects.latest_by_authors(
+            (author.pk for author in authors), self.get_recipes_limit()
+        )
+        for author in authors:
+            author.latest_recipes = recipes[author.pk]
 
     def to_representation(self, instance):
+        if not hasattr(instance, "latest_recipes"):
+            self.attach_recipes([instance])
         representation = super().to_representation(instance)
         if instance.avatar:
             avatar_url = instance.avatar.url
@@ -384,38 +621,6 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return representation
 
 
-class SubscribeActionSerializer(serializers.ModelSerializer):
-    """Сериализатор пользователей для Подписок."""
-
-    class Meta:
-        model = Subscription
-        fields = ("subscribed_to",)
-
-    def create(self, validated_data):
-        current_user = self.context["request"].user
-        subscribed_to = validated_data["subscribed_to"]
-        pair, created = Subscription.objects.get_or_create(
-            user=current_user, subscribed_to=subscribed_to
-        )
-        if not created:
-            raise serializers.ValidationError("""Подписка существует.""")
-        return pair
-
-    def to_representation(self, instance):
-        subscribed_to = instance.subscribed_to
-        context = {"current_user": instance.user}
-        user_with_count = User.objects.annotate(
-            recipes_count=Count("recipes"),
-            is_subscribed=Exists(
-                Subscription.objects.filter(
-                    user=context["current_user"], subscribed_to=subscribed_to
-                )
-            ),
-        ).get(id=subscribed_to.id)
-        serializer = SubscriptionSerializer(user_with_count, context=context)
-        return serializer.data
-
-
 class AvatarSerializer(serializers.ModelSerializer):
     """Сериализатор работы с аватаром."""
 
@@ -436,6 +641,49 @@ class AvatarSerializer(serializers.ModelSerializer):
         return attrs
 
     def update(self, instance, validated_data):
-        if "avatar" in validated_data and instance.avatar:
-            instance.avatar.delete(save=False)
-        return super().update(instance, validated_data)
+        # Файл удаляется после сохранения: хранилище не удалит файл,
+        # на который ещё ссылается запись
+        old_avatar = instance.avatar.name
+        instance = super().update(instance, validated_data)
+        delete_on_commit([old_avatar])
+        return instance
+
+
+class BatchSerializer(serializers.Serializer):
+    """Список id для пакетных операций."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_SIZE,
+    )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """id рецептов через запятую: ?ids=1,2,3."""
+
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(",") if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError(
+                "Ожидаются целые числа через запятую."
+            )
+        # Повторы убираются с сохранением порядка
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError("Список id пуст.")
+        if len(ids) > settings.RECIPES_BATCH_MAX_IDS:
+            raise serializers.ValidationError(
+                f"Не больше {settings.RECIPES_BATCH_MAX_IDS} id за запрос."
+            )
+        return ids
+
+
+class UploadSerializer(serializers.Serializer):
+    """Начало загрузки файла частями."""
+
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1, max_value=IMAGE_MAX_SIZE)
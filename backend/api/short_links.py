@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+from api.cache import get_short_links_version
+from constants.cache_constants import (SHORT_LINK_CACHE_SIZE,
+                                       SHORT_LINK_CACHE_TIMEOUT)
+from recipes.models import Recipe
+
+
+class LRUCache:
+    """Ограниченный по размеру и времени жизни кеш в памяти процесса."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.timeout)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+
+short_link_cache = LRUCache(SHORT_LINK_CACHE_SIZE, SHORT_LINK_CACHE_TIMEOUT)
+
+
+def resolve_short_link(short_link):
+    """Возвращает id рецепта по короткой ссылке или None.
+
+    Ссылка рецепта не меняется, поэтому найденные пары кешируются в памяти
+    процесса. Каждая запись помечена версией коротких ссылок из общего
+    кеша: удаление рецепта меняет версию, и записи прежней версии
+    перестают действовать во всех воркерах. Промахи не кешируются: новый
+    рецепт доступен по ссылке сразу.
+    """
+    version = get_short_links_version()
+    item = short_link_cache.get(short_link)
+    if item is not None and item[1] == version:
+        return item[0]
+    recipe_id = (
+        Recipe.objects.filter(short_link=short_link)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if recipe_id is not None:
+        short_link_cache.set(short_link, (recipe_id, version))
+    return recipe_id
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens
+from api.cache import bump_catalog_version, bump_short_links_version
+from api.short_links import short_link_cache
+from foodgram_backend.storage import delete_on_commit
+from recipes.models import Ingredient, Recipe, Tag
+
+User = get_user_model()
+
+# Поля автора, которые попадают в карточку рецепта
+AUTHOR_CARD_FIELDS = {"email", "username", "first_name", "last_name", "avatar"}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_catalog(sender, **kwargs):
+    """Сбрасывает кеш рецептов при изменении тегов и ингредиентов.
+
+    Версия меняется после фиксации транзакции, иначе другой воркер успеет
+    загрузить справочник без изменений под новой версией.
+    """
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields,
+                              **kwargs):
+    """Сбрасывает кеш рецептов автора при изменении его карточки."""
+    if created or (
+        update_fields is not None
+        and not AUTHOR_CARD_FIELDS.intersection(update_fields)
+    ):
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_images(sender, instance, **kwargs):
+    """Снимает ссылки на картинки удалённого рецепта."""
+    delete_on_commit([
+        instance.image.name,
+        instance.image_small.name,
+        instance.image_medium.name,
+    ])
+
+
+@receiver(post_delete, sender=User)
+def release_avatar(sender, instance, **kwargs):
+    """Снимает ссылку на аватар удалённого пользователя."""
+    delete_on_commit([instance.avatar.name])
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_short_link(sender, instance, **kwargs):
+    """Сбрасывает кеш коротких ссылок во всех процессах."""
+    if instance.short_link:
+        short_link_cache.delete(instance.short_link)
+        transaction.on_commit(bump_short_links_version)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Сбрасывает кеш аутентификации при выходе и удалении токена."""
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Сбрасывает кеш аутентификации при изменении пользователя.
+
+    Так блокировка действует сразу, а в request.user не остаются
+    устаревшие данные. После смены пароля токены удаляются: все сеансы
+    пользователя завершаются.
+    """
+    if created:
+        return
+    tokens = Token.objects.filter(user=instance)
+    # set_password() хранит новый пароль в _password до конца save()
+    if instance._password is not None:
+        tokens.delete()
+        return
+    invalidate_tokens(tokens.values_list("key", flat=True))
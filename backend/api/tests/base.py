@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api.cache import bump_catalog_version
+from api.catalog import get_catalog
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag, TagRecipe
+
+User = get_user_model()
+
+LOCMEM_CACHE = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+TEST_CACHES = {
+    alias: dict(LOCMEM_CACHE, LOCATION=alias)
+    for alias in ("default", "shared", "auth")
+}
+# Прозрачная картинка 1x1
+PNG = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADU"
+    "lEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+
+class FoodgramTestMixin:
+    """Кеши в памяти, временный MEDIA_ROOT и фабрики тестовых данных."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(
+            CACHES=TEST_CACHES, MEDIA_ROOT=cls.media_root
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        # Сигналы справочников меняют версию после фиксации транзакции,
+        # а TestCase её не фиксирует
+        bump_catalog_version()
+        get_catalog()
+
+    @staticmethod
+    def create_user(name, **kwargs):
+        return User.objects.create_user(
+            email=f"{name}@example.com",
+            username=name,
+            first_name=name,
+            last_name=name,
+            password="Password123!",
+            **kwargs,
+        )
+
+    @staticmethod
+    def create_catalog(tags=3, ingredients=10):
+        return (
+            [
+                Tag.objects.create(name=f"Тег {number}", slug=f"tag{number}")
+                for number in range(tags)
+            ],
+            [
+                Ingredient.objects.create(
+                    name=f"Ингредиент {number}", measurement_unit="г"
+                )
+                for number in range(ingredients)
+            ],
+        )
+
+    @staticmethod
+    def create_recipe(author, tags, ingredients, name="Рецепт"):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/test.png",
+        )
+        TagRecipe.objects.bulk_create(
+            TagRecipe(recipe=recipe, tag=tag) for tag in tags
+        )
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=5)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    @staticmethod
+    def client_for(user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
@@ -0,0 +1,77 @@
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import AUTH_CACHE_ALIAS, token_cache_key
+from api.tests.base import PNG, FoodgramTestMixin
+from users.models import Subscription
+
+
+class CachedTokenAuthenticationTests(FoodgramTestMixin, TestCase):
+    """Кеш токенов сбрасывается сразу, как только токен перестаёт
+    действовать."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user("user")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_me(self):
+        return self.client.get("/api/users/me/")
+
+    def assert_cached(self, cached=True):
+        value = caches[AUTH_CACHE_ALIAS].get(token_cache_key(self.token.key))
+        self.assertEqual(value is not None, cached)
+
+    def test_cached_token_skips_database(self):
+        self.assertEqual(self.get_me().status_code, 200)
+        self.assert_cached()
+        with self.assertNumQueries(0):
+            response = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(
+            "password", caches[AUTH_CACHE_ALIAS].get(
+                token_cache_key(self.token.key)
+            )
+        )
+
+    def test_logout(self):
+        self.get_me()
+        response = self.client.post("/api/auth/token/logout/")
+        self.assertEqual(response.status_code, 204)
+        self.assert_cached(False)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_set_password(self):
+        self.get_me()
+        self.user.set_password("NewPassword456!")
+        self.user.save()
+        self.assert_cached(False)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_deactivation(self):
+        self.get_me()
+        self.user.is_active = False
+        self.user.save()
+        self.assert_cached(False)
+        self.assertEqual(self.get_me().status_code, 401)
+
+    def test_profile_save_keeps_counters(self):
+        tags, ingredients = self.create_catalog(tags=1, ingredients=1)
+        self.create_recipe(self.user, tags, ingredients)
+        Subscription.objects.create(
+            user=self.create_user("subscriber"), subscribed_to=self.user
+        )
+        self.get_me()
+        self.assert_cached()
+        response = self.client.put(
+            "/api/users/me/avatar/", {"avatar": PNG}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 1)
+        self.assertEqual(self.user.subscribers_count, 1)
+        self.assertTrue(self.user.avatar)
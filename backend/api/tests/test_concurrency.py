@@ -0,0 +1,89 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import SkipTest
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from api.tests.base import FoodgramTestMixin
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+THREADS = 8
+
+
+class ConcurrentToggleTests(FoodgramTestMixin, TransactionTestCase):
+    """Повторные запросы из параллельных потоков, как при двойном клике.
+
+    Из одинаковых запросов ровно один меняет данные, остальные получают
+    400, ошибок 500 нет.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            # Потоки не могут одновременно писать в базу SQLite в памяти
+            cls.tearDownClass()
+            raise SkipTest("Нужна база PostgreSQL или SQLite в файле.")
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user("user")
+        self.author = self.create_user("author")
+        tags, ingredients = self.create_catalog(tags=1, ingredients=2)
+        self.recipe = self.create_recipe(self.author, tags, ingredients)
+
+    def hammer(self, method, url):
+        """Отправляет THREADS одинаковых запросов одновременно."""
+        barrier = threading.Barrier(THREADS)
+
+        def send(_):
+            client = self.client_for(self.user)
+            try:
+                barrier.wait()
+                return getattr(client, method)(url).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(THREADS) as executor:
+            return Counter(executor.map(send, range(THREADS)))
+
+    def assert_toggle(self, url, model, **lookup):
+        self.assertEqual(
+            self.hammer("post", url), {201: 1, 400: THREADS - 1}
+        )
+        self.assertEqual(model.objects.filter(**lookup).count(), 1)
+        self.assertEqual(
+            self.hammer("delete", url), {204: 1, 400: THREADS - 1}
+        )
+        self.assertFalse(model.objects.filter(**lookup).exists())
+
+    def test_favorite(self):
+        self.assert_toggle(
+            f"/api/recipes/{self.recipe.pk}/favorite/",
+            Favorite,
+            user=self.user,
+            recipe=self.recipe,
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart(self):
+        self.assert_toggle(
+            f"/api/recipes/{self.recipe.pk}/shopping_cart/",
+            ShoppingCart,
+            user=self.user,
+            recipe=self.recipe,
+        )
+
+    def test_subscribe(self):
+        self.assert_toggle(
+            f"/api/users/{self.author.pk}/subscribe/",
+            Subscription,
+            user=self.user,
+            subscribed_to=self.author,
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 0)
@@ -0,0 +1,74 @@
+import base64
+from types import SimpleNamespace
+
+from django.contrib.admin import site
+from django.test import TestCase
+
+from api.tests.base import PNG, FoodgramTestMixin
+from recipes.admin import RecipeAdmin
+from recipes.models import Recipe
+
+
+class Base64ImageFieldTests(FoodgramTestMixin, TestCase):
+    """Изображение в base64 принимается и с переносами строк."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user("user")
+
+    def put_avatar(self, avatar):
+        return self.client_for(self.user).put(
+            "/api/users/me/avatar/", {"avatar": avatar}, format="json"
+        )
+
+    def test_line_wrapped_base64(self):
+        header, _, imgstr = PNG.partition(",")
+        wrapped = base64.encodebytes(base64.b64decode(imgstr)).decode()
+        self.assertIn("\n", wrapped)
+        response = self.put_avatar(f"{header},{wrapped}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_base64(self):
+        response = self.put_avatar("data:image/png;base64,not*base64")
+        self.assertEqual(response.status_code, 400)
+
+
+class RecipeAdminImageTests(FoodgramTestMixin, TestCase):
+    """Смена картинки в админке сбрасывает миниатюры прежней."""
+
+    def setUp(self):
+        super().setUp()
+        tags, ingredients = self.create_catalog(tags=1, ingredients=1)
+        self.recipe = self.create_recipe(
+            self.create_user("author"), tags, ingredients
+        )
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image_small="recipes/thumbnails/test_100.jpg",
+            image_medium="recipes/thumbnails/test_400.jpg",
+        )
+        self.recipe.refresh_from_db()
+        self.admin = RecipeAdmin(Recipe, site)
+
+    def save(self, changed_data):
+        form = SimpleNamespace(
+            changed_data=changed_data, initial={"image": self.recipe.image}
+        )
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.admin.save_model(None, self.recipe, form, change=True)
+        self.recipe.refresh_from_db()
+        return callbacks
+
+    def test_image_change_clears_thumbnails(self):
+        self.recipe.image = "recipes/images/other.png"
+        callbacks = self.save(["image"])
+        self.assertEqual(self.recipe.image_small.name, "")
+        self.assertEqual(self.recipe.image_medium.name, "")
+        # Снятие ссылок на миниатюры и нарезка новых
+        self.assertEqual(len(callbacks), 2)
+
+    def test_other_changes_keep_thumbnails(self):
+        callbacks = self.save(["name"])
+        self.assertEqual(
+            self.recipe.image_small.name, "recipes/thumbnails/test_100.jpg"
+        )
+        self.assertEqual(callbacks, [])
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.tests.base import FoodgramTestMixin
+from recipes.models import Recipe
+
+
+class RecipePagesMixin(FoodgramTestMixin):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.tags, ingredients = cls.create_catalog(tags=2, ingredients=1)
+        cls.recipes = [
+            cls.create_recipe(
+                cls.author, cls.tags[number % 2:number % 2 + 1], ingredients,
+                name=f"Рецепт {number}",
+            )
+            for number in range(6)
+        ]
+        # Несколько рецептов опубликованы одновременно
+        now = timezone.now()
+        for number, recipe in enumerate(cls.recipes):
+            Recipe.objects.filter(pk=recipe.pk).update(
+                pub_date=now - timedelta(days=(len(cls.recipes) - number) // 3)
+            )
+
+    def get_ids(self, path, params, limit=2):
+        """id рецептов со всех страниц, по ссылкам next."""
+        client = self.client_for()
+        response = client.get(path, dict(params, limit=limit))
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(recipe["id"] for recipe in response.data["results"])
+            if not response.data["next"]:
+                return ids
+            response = client.get(response.data["next"])
+
+    def expected_ids(self, recipes=None, ordering=("-pub_date", "-id")):
+        recipes = Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes or self.recipes]
+        )
+        return list(
+            recipes.order_by(*ordering).values_list("id", flat=True)
+        )
+
+
+class RecipeOrderingTests(RecipePagesMixin, TestCase):
+    """Сортировка ?ordering= стабильна при равных значениях."""
+
+    def test_equal_favorites_count(self):
+        ids = self.get_ids("/api/recipes/", {"ordering": "-favorites_count"})
+        self.assertEqual(ids, self.expected_ids())
+
+    def test_order_by_pub_date(self):
+        ids = self.get_ids("/api/recipes/", {"ordering": "pub_date"})
+        self.assertEqual(
+            ids, self.expected_ids(ordering=("pub_date", "-id"))
+        )
+
+
+class RecipeCursorPaginationTests(RecipePagesMixin, TestCase):
+    """Курсорная пагинация списка рецептов."""
+
+    def test_walk_pages(self):
+        for limit in (1, 2, 4):
+            with self.subTest(limit=limit):
+                ids = self.get_ids("/api/recipes/", {"cursor": ""}, limit)
+                self.assertEqual(ids, self.expected_ids())
+
+    def test_page_without_count(self):
+        response = self.client_for().get(
+            "/api/recipes/", {"cursor": "", "limit": 2}
+        )
+        self.assertEqual(set(response.data), {"next", "results"})
+
+    def test_invalid_cursor(self):
+        client = self.client_for()
+        # Не base64, base64 без разделителя и строка вместо даты
+        for cursor in ("не курсор", "bm90LWEtY3Vyc29y", "MjAyNHwx"):
+            with self.subTest(cursor=cursor):
+                response = client.get("/api/recipes/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_filters(self):
+        tag = self.tags[0]
+        tagged = [
+            recipe for recipe in self.recipes
+            if recipe.tags.filter(pk=tag.pk).exists()
+        ]
+        ids = self.get_ids("/api/recipes/", {"cursor": "", "tags": tag.slug})
+        self.assertEqual(ids, self.expected_ids(tagged))
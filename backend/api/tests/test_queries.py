@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+from api.tests.base import FoodgramTestMixin
+from users.models import Subscription
+
+# Подсчёт, рецепты, ингредиенты и теги страницы
+LIST_QUERIES = 4
+# Рецепт, ингредиенты и теги
+DETAIL_QUERIES = 3
+
+
+class RecipeQueryCountTests(FoodgramTestMixin, TestCase):
+    """Число запросов списка и карточки рецепта не зависит от объёма.
+
+    Запросы считаются при пустом кеше представлений рецептов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user("reader")
+        tags, ingredients = cls.create_catalog()
+        authors = [cls.create_user(f"author{number}") for number in range(3)]
+        Subscription.objects.create(user=cls.user, subscribed_to=authors[0])
+        cls.recipes = [
+            cls.create_recipe(
+                authors[number % len(authors)],
+                tags[:2],
+                ingredients[:5],
+                name=f"Рецепт {number}",
+            )
+            for number in range(12)
+        ]
+
+    def assert_list_queries(self, client):
+        for limit in (2, 10):
+            with self.subTest(limit=limit):
+                self.setUp()
+                with self.assertNumQueries(LIST_QUERIES):
+                    response = client.get("/api/recipes/", {"limit": limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_list_anonymous(self):
+        self.assert_list_queries(self.client_for())
+
+    def test_list_authenticated(self):
+        self.assert_list_queries(self.client_for(self.user))
+
+    def test_detail_anonymous(self):
+        with self.assertNumQueries(DETAIL_QUERIES):
+            response = self.client_for().get(
+                f"/api/recipes/{self.recipes[0].pk}/"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_authenticated(self):
+        with self.assertNumQueries(DETAIL_QUERIES):
+            response = self.client_for(self.user).get(
+                f"/api/recipes/{self.recipes[0].pk}/"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["author"]["is_subscribed"])
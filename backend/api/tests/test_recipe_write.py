@@ -0,0 +1,98 @@
+from django.test import TestCase
+
+from api.serializers import add_tags_and_ingredients
+from api.tests.base import FoodgramTestMixin
+from recipes.models import IngredientRecipe, ShoppingCart, ShoppingListItem
+
+
+class RecipeIngredientsUpdateTests(FoodgramTestMixin, TestCase):
+    """Изменение состава рецепта применяется разницей с сохранённым."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.tags, cls.ingredients = cls.create_catalog()
+        cls.recipe = cls.create_recipe(
+            cls.author, cls.tags[:2], cls.ingredients[:3]
+        )
+
+    def update(self, ingredients, tags):
+        return self.client_for(self.author).patch(
+            f"/api/recipes/{self.recipe.pk}/",
+            {
+                "name": "Рецепт",
+                "text": "Описание",
+                "cooking_time": 10,
+                "tags": [tag.pk for tag in tags],
+                "ingredients": [
+                    {"id": ingredient.pk, "amount": amount}
+                    for ingredient, amount in ingredients
+                ],
+            },
+            format="json",
+        )
+
+    def stored_ingredients(self):
+        return dict(
+            IngredientRecipe.objects.filter(recipe=self.recipe).values_list(
+                "ingredient", "amount"
+            )
+        )
+
+    def test_removed_ingredients_and_tags_are_deleted(self):
+        first, second, third = self.ingredients[:3]
+        response = self.update([(first, 5)], self.tags[:1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_ingredients(), {first.pk: 5})
+        self.assertEqual(
+            list(self.recipe.tags.values_list("pk", flat=True)),
+            [self.tags[0].pk],
+        )
+
+    def test_remove_change_and_add_in_one_update(self):
+        first, second, third, fourth = self.ingredients[:4]
+        response = self.update(
+            [(first, 5), (second, 7), (fourth, 1)], self.tags[1:3]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.stored_ingredients(),
+            {first.pk: 5, second.pk: 7, fourth.pk: 1},
+        )
+        self.assertEqual(
+            set(self.recipe.tags.values_list("pk", flat=True)),
+            {self.tags[1].pk, self.tags[2].pk},
+        )
+        self.assertEqual(
+            {item["id"] for item in response.data["ingredients"]},
+            {first.pk, second.pk, fourth.pk},
+        )
+
+    def test_changed_ingredient_ids(self):
+        first, second, third, fourth = self.ingredients[:4]
+        changed = add_tags_and_ingredients(
+            self.recipe,
+            [
+                {"id": first, "amount": 5},
+                {"id": second, "amount": 7},
+                {"id": fourth, "amount": 1},
+            ],
+            self.tags[:2],
+        )
+        self.assertEqual(
+            set(changed), {second.pk, third.pk, fourth.pk}
+        )
+
+    def test_removal_updates_shopping_list(self):
+        customer = self.create_user("customer")
+        ShoppingCart.objects.create(user=customer, recipe=self.recipe)
+        first = self.ingredients[0]
+        self.update([(first, 5)], self.tags[:1])
+        self.assertEqual(
+            dict(
+                ShoppingListItem.objects.filter(user=customer).values_list(
+                    "ingredient", "amount"
+                )
+            ),
+            {first.pk: 5},
+        )
@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+from api.cache import get_short_links_version
+from api.short_links import resolve_short_link, short_link_cache
+from api.tests.base import FoodgramTestMixin
+
+
+class ShortLinkTests(FoodgramTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        short_link_cache.data.clear()
+        tags, ingredients = self.create_catalog(tags=1, ingredients=1)
+        self.recipe = self.create_recipe(
+            self.create_user("author"), tags, ingredients
+        )
+
+    def test_redirect_uses_cache(self):
+        url = f"/s/{self.recipe.short_link}/"
+        self.assertEqual(self.client.get(url).status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertTrue(
+            response["Location"].endswith(f"/recipes/{self.recipe.pk}/")
+        )
+
+    def test_delete_invalidates_other_processes(self):
+        short_link = self.recipe.short_link
+        resolve_short_link(short_link)
+        cached = short_link_cache.get(short_link)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        # Запись, оставшаяся в кеше другого воркера
+        short_link_cache.set(short_link, cached)
+        self.assertNotEqual(cached[1], get_short_links_version())
+        self.assertIsNone(resolve_short_link(short_link))
+        self.assertEqual(self.client.get(f"/s/{short_link}/").status_code, 404)
@@ -0,0 +1,98 @@
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.admin import site
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from api.tests.base import PNG, FoodgramTestMixin
+from recipes.admin import RecipeAdmin
+from recipes.models import Recipe, StoredFile
+
+
+class StorageTestMixin(FoodgramTestMixin):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.tags, cls.ingredients = cls.create_catalog(tags=1, ingredients=1)
+
+    def post_recipe(self, name="Рецепт"):
+        response = self.client_for(self.author).post(
+            "/api/recipes/",
+            {
+                "name": name,
+                "text": "Описание",
+                "cooking_time": 10,
+                "image": PNG,
+                "tags": [self.tags[0].pk],
+                "ingredients": [{"id": self.ingredients[0].pk, "amount": 1}],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return Recipe.objects.get(pk=response.data["id"])
+
+    def assert_stored(self, name, references):
+        self.assertEqual(os.path.exists(self.media_path(name)), references > 0)
+        self.assertEqual(
+            StoredFile.objects.filter(name=name).values_list(
+                "references", flat=True
+            ).first(),
+            references or None,
+        )
+
+    def media_path(self, name):
+        return os.path.join(self.media_root, name)
+
+
+class RecipeAdminStorageTests(StorageTestMixin, TestCase):
+    """Смена картинки в админке снимает ссылку на прежнюю."""
+
+    @mock.patch("recipes.admin.schedule_thumbnails")
+    def test_replaced_image_is_released(self, schedule_thumbnails):
+        recipe = self.post_recipe()
+        old_name = recipe.image.name
+        form = SimpleNamespace(
+            changed_data=["image"], initial={"image": recipe.image}
+        )
+        recipe.image = ContentFile(b"new image", name="new.png")
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeAdmin(Recipe, site).save_model(
+                None, recipe, form, change=True
+            )
+        self.assert_stored(old_name, 0)
+        self.assert_stored(recipe.image.name, 1)
+        schedule_thumbnails.assert_called_once_with(recipe)
+
+
+class HashedStorageTests(StorageTestMixin, TestCase):
+    """Одинаковые картинки хранятся одним файлом со счётчиком ссылок."""
+
+    def delete_recipe(self, recipe):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_for(self.author).delete(
+                f"/api/recipes/{recipe.pk}/"
+            )
+        self.assertEqual(response.status_code, 204)
+
+    def test_identical_uploads_share_file(self):
+        first, second = self.post_recipe("Первый"), self.post_recipe("Второй")
+        self.assertEqual(first.image.name, second.image.name)
+        self.assert_stored(first.image.name, 2)
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.media_path(first.image.name))),
+            [os.path.basename(first.image.name)],
+        )
+
+    def test_delete_keeps_shared_file(self):
+        first, second = self.post_recipe("Первый"), self.post_recipe("Второй")
+        self.delete_recipe(first)
+        self.assert_stored(second.image.name, 1)
+
+    def test_delete_last_reference_removes_file(self):
+        first, second = self.post_recipe("Первый"), self.post_recipe("Второй")
+        self.delete_recipe(first)
+        self.delete_recipe(second)
+        self.assert_stored(first.image.name, 0)
@@ -0,0 +1,127 @@
+import base64
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from api.tests.base import PNG, FoodgramTestMixin
+from constants.image_constants import UPLOADS_PER_USER_MAX
+from recipes.models import Recipe
+
+PNG_BYTES = base64.b64decode(PNG.partition(",")[2])
+CHUNK_TYPE = "application/offset+octet-stream"
+
+
+class ChunkedUploadTests(FoodgramTestMixin, TestCase):
+    """Загрузка картинки частями и её использование в рецепте."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user("author")
+        cls.tags, cls.ingredients = cls.create_catalog(tags=1, ingredients=1)
+
+    def setUp(self):
+        super().setUp()
+        uploads_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, uploads_dir, ignore_errors=True)
+        settings_override = override_settings(UPLOADS_DIR=uploads_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = self.client_for(self.author)
+
+    def create_upload(self, size=len(PNG_BYTES)):
+        response = self.client.post(
+            "/api/uploads/", {"filename": "image.png", "size": size},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["token"]
+
+    def send(self, token, offset, chunk, content_type=CHUNK_TYPE):
+        return self.client.patch(
+            f"/api/uploads/{token}/", chunk, content_type=content_type,
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self):
+        token = self.create_upload()
+        self.send(token, 0, PNG_BYTES[:20])
+        self.send(token, 20, PNG_BYTES[20:])
+        return token
+
+    def create_recipe_from(self, token):
+        return self.client.post(
+            "/api/recipes/",
+            {
+                "name": "Рецепт",
+                "text": "Описание",
+                "cooking_time": 10,
+                "image": f"upload:{token}",
+                "tags": [self.tags[0].pk],
+                "ingredients": [{"id": self.ingredients[0].pk, "amount": 1}],
+            },
+            format="json",
+        )
+
+    def test_resume(self):
+        token = self.create_upload()
+        response = self.send(token, 0, PNG_BYTES[:20])
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f"/api/uploads/{token}/")
+        self.assertEqual(response.data["offset"], 20)
+        self.assertEqual(response["Upload-Offset"], "20")
+        response = self.send(token, 20, PNG_BYTES[20:])
+        self.assertEqual(response.data["offset"], len(PNG_BYTES))
+
+    def test_wrong_offset(self):
+        token = self.create_upload()
+        self.send(token, 0, PNG_BYTES[:20])
+        response = self.send(token, 0, PNG_BYTES[:20])
+        self.assertEqual(response.status_code, 409)
+        response = self.client.get(f"/api/uploads/{token}/")
+        self.assertEqual(response.data["offset"], 20)
+
+    def test_other_content_types_rejected(self):
+        token = self.create_upload()
+        response = self.client.patch(
+            f"/api/uploads/{token}/", {"chunk": "data"}, format="json",
+            HTTP_UPLOAD_OFFSET="0",
+        )
+        self.assertEqual(response.status_code, 415)
+
+    def test_recipe_from_upload(self):
+        token = self.upload()
+        response = self.create_recipe_from(token)
+        self.assertEqual(response.status_code, 201, response.data)
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        with recipe.image.open() as file:
+            self.assertEqual(file.read(), PNG_BYTES)
+
+    def test_incomplete_upload_rejected(self):
+        token = self.create_upload()
+        self.send(token, 0, PNG_BYTES[:20])
+        response = self.create_recipe_from(token)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("image", response.data)
+
+    def test_token_reuse_rejected(self):
+        token = self.upload()
+        self.assertEqual(self.create_recipe_from(token).status_code, 201)
+        response = self.create_recipe_from(token)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("image", response.data)
+
+    def test_other_user_upload_not_found(self):
+        token = self.create_upload()
+        client = self.client_for(self.create_user("other"))
+        response = client.get(f"/api/uploads/{token}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_open_uploads_limit(self):
+        for _ in range(UPLOADS_PER_USER_MAX):
+            self.create_upload()
+        response = self.client.post(
+            "/api/uploads/", {"filename": "image.png", "size": 10},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
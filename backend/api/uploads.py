@@ -0,0 +1,212 @@
+import fcntl
+import json
+import os
+import re
+import secrets
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from constants.image_constants import (UPLOAD_TIMEOUT, UPLOADS_CLEAR_INTERVAL,
+                                       UPLOADS_PER_USER_MAX)
+
+UPLOAD_TOKEN_PREFIX = "upload:"
+TOKEN_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Время последнего запуска clear_uploads в этом процессе
+_cleared_at = 0.0
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class OffsetConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Смещение не совпадает с уже загруженным объёмом."
+    default_code = "offset_conflict"
+
+
+class UploadedChunksFile(UploadedFile):
+    """Файл, собранный из частей.
+
+    Путь к файлу на диске позволяет хранилищу переместить его, а не
+    копировать, а Pillow — проверить изображение без чтения в память.
+    """
+
+    def __init__(self, path, name, size):
+        super().__init__(open(path, "rb"), name, None, size)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+class ChunkedUpload:
+    """Загрузка файла частями во временный каталог UPLOADS_DIR.
+
+    У каждого пользователя свой подкаталог. Рядом с данными (<token>.part)
+    хранится описание загрузки (<token>.json): владелец, имя файла, полный
+    размер и время создания.
+    """
+
+    def __init__(self, token, meta):
+        self.token = token
+        self.meta = meta
+
+    @staticmethod
+    def directory(user_id):
+        return os.path.join(settings.UPLOADS_DIR, str(user_id))
+
+    @classmethod
+    def path(cls, user_id, token, suffix):
+        return os.path.join(cls.directory(user_id), f"{token}.{suffix}")
+
+    @property
+    def data_path(self):
+        return self.path(self.meta["user"], self.token, "part")
+
+    @property
+    def size(self):
+        return self.meta["size"]
+
+    @property
+    def offset(self):
+        return os.path.getsize(self.data_path)
+
+    @property
+    def complete(self):
+        return self.offset == self.size
+
+    @classmethod
+    def create(cls, user, filename, size):
+        """Новая загрузка пользователя.
+
+        Заодно удаляются его просроченные и использованные загрузки,
+        а раз в UPLOADS_CLEAR_INTERVAL — и загрузки остальных.
+        """
+        clear_uploads_periodically()
+        directory = cls.directory(user.pk)
+        os.makedirs(directory, exist_ok=True)
+        if clear_directory(directory)[1] >= UPLOADS_PER_USER_MAX:
+            raise ValidationError({
+                "detail": "Слишком много незавершённых загрузок, "
+                f"не больше {UPLOADS_PER_USER_MAX}."
+            })
+        token = secrets.token_hex(16)
+        meta = {
+            "user": user.pk,
+            "filename": os.path.basename(filename),
+            "size": size,
+            "created": time.time(),
+        }
+        open(cls.path(user.pk, token, "part"), "xb").close()
+        with open(cls.path(user.pk, token, "json"), "x") as file:
+            json.dump(meta, file)
+        return cls(token, meta)
+
+    @classmethod
+    def get(cls, token, user):
+        """Незавершённая или готовая загрузка пользователя либо None."""
+        if not TOKEN_RE.match(token):
+            return None
+        try:
+            with open(cls.path(user.pk, token, "json")) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        upload = cls(token, meta)
+        if (
+            meta["user"] != user.pk
+            or meta["created"] + UPLOAD_TIMEOUT < time.time()
+            or not os.path.exists(upload.data_path)
+        ):
+            return None
+        return upload
+
+    def append(self, offset, chunk):
+        """Дописывает часть, начинающуюся с offset.
+
+        Файл блокируется на время проверки смещения и записи, поэтому
+        повторно отправленная часть не запишется дважды.
+        """
+        with open(self.data_path, "ab") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            current = file.seek(0, os.SEEK_END)
+            if offset != current:
+                raise OffsetConflict()
+            if current + len(chunk) > self.size:
+                raise ValidationError(
+                    {"detail": "Данных больше, чем объявленный размер."}
+                )
+            file.write(chunk)
+            return current + len(chunk)
+
+    def as_file(self):
+        return UploadedChunksFile(
+            self.data_path, self.meta["filename"], self.size
+        )
+
+    def delete(self):
+        for suffix in ("part", "json"):
+            remove_file(self.path(self.meta["user"], self.token, suffix))
+
+
+def clear_directory(directory):
+    """Удаляет просроченные и уже использованные загрузки из каталога
+    пользователя.
+
+    Возвращает количество удалённых и оставшихся загрузок.
+    """
+    removed = remaining = 0
+    deadline = time.time() - UPLOAD_TIMEOUT
+    for name in os.listdir(directory):
+        token, _, suffix = name.partition(".")
+        path = os.path.join(directory, name)
+        data_path = os.path.join(directory, f"{token}.part")
+        try:
+            expired = os.path.getmtime(path) < deadline
+        except FileNotFoundError:
+            # Загрузку уже удалил параллельный запрос
+            continue
+        if suffix == "json":
+            if expired or not os.path.exists(data_path):
+                remove_file(data_path)
+                remove_file(path)
+                removed += 1
+            else:
+                remaining += 1
+        elif suffix == "part" and expired:
+            # Данные без описания остаются после сбоя при создании
+            if not os.path.exists(os.path.join(directory, f"{token}.json")):
+                remove_file(path)
+    return removed, remaining
+
+
+def clear_uploads():
+    """Удаляет просроченные и уже использованные загрузки всех
+    пользователей."""
+    if not os.path.isdir(settings.UPLOADS_DIR):
+        return 0
+    removed = 0
+    for name in os.listdir(settings.UPLOADS_DIR):
+        directory = os.path.join(settings.UPLOADS_DIR, name)
+        if os.path.isdir(directory):
+            removed += clear_directory(directory)[0]
+    return removed
+
+
+def clear_uploads_periodically():
+    """Запускает clear_uploads не чаще раза в UPLOADS_CLEAR_INTERVAL."""
+    global _cleared_at
+    now = time.time()
+    if now - _cleared_at < UPLOADS_CLEAR_INTERVAL:
+        return
+    _cleared_at = now
+    clear_uploads()
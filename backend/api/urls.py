@@ -3,8 +3,8 @@ from django.conf.urls.static import static
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
-                       UserGetViewSet)
+from api.views import (IngredientViewSet, MetricsView, RecipeViewSet,
+                       TagViewSet, UploadViewSet, UserGetViewSet)
 
 app_name = "api"
 
@@ -14,9 +14,11 @@ router.register(r"users", UserGetViewSet, basename="user")
 router.register(r"tags", TagViewSet, basename="tag")
 router.register(r"ingredients", IngredientViewSet, basename="ingredient")
 router.register(r"recipes", RecipeViewSet, basename="recipe")
+router.register(r"uploads", UploadViewSet, basename="upload")
 
 
 urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
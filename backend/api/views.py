@@ -1,33 +1,72 @@
+import hashlib
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Exists, OuterRef
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import UserSerializer
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import (SAFE_METHODS, AllowAny,
+from rest_framework.exceptions import UnsupportedMediaType
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import (SAFE_METHODS, AllowAny, IsAdminUser,
                                         IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-
-from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import FoodgramPagination
+from rest_framework.views import APIView
+
+from api.autocomplete import autocomplete_ingredients
+from api.batch import FavoriteBatch, ShoppingCartBatch, SubscriptionBatch
+from api.cache import get_catalog_version
+from api.catalog import get_catalog
+from api.filters import RecipeFilter, StableOrderingFilter
+from api.metrics import metrics
+from api.mixins import ConditionalGetMixin
+from api.pagination import FeedPagination, FoodgramPagination, RecipePagination
+from api.parsers import ChunkParser, MultipartJsonParser
 from api.permissions import ActionRestriction, IsAuthorOrStaff
-from api.renderer import PlainTextRenderer
-from api.serializers import (AvatarSerializer, FavoriteSerializer,
+from api.renderer import (CSVRenderer, PlainTextRenderer,
+                          PrintableTextRenderer, ShoppingListJSONRenderer)
+from api.serializers import (AvatarSerializer, BatchSerializer,
                              IngredientSerializer, NewUserSerializer,
-                             RecipeIWriteSerializer, RecipeReadSerializer,
-                             ShoppingCartSerializer, SubscribeActionSerializer,
+                             RecipeIdsSerializer, RecipeIWriteSerializer,
+                             RecipeReadSerializer, RecipeRepresentation,
+                             ShoppingListItemSerializer,
                              SubscriptionSerializer, TagSerializer,
-                             UserCreateSerializer)
-from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag)
+                             UploadSerializer, UserCreateSerializer)
+from api.short_links import resolve_short_link
+from api.uploads import UPLOAD_TOKEN_PREFIX, ChunkedUpload
+from constants.cache_constants import FACETS_CACHE_TIMEOUT
+from constants.recipes_constants import (AUTOCOMPLETE_LIMIT,
+                                         AUTOCOMPLETE_MAX_LIMIT)
+from foodgram_backend.storage import delete_on_commit
+from recipes.models import (Favorite, FeedEntry, Ingredient, Recipe,
+                            ShoppingCart, ShoppingListItem, Tag)
 from users.models import Subscription
 
 User = get_user_model()
 
+# Параметры, не влияющие на состав рецептов при подсчёте фасетов
+FACETS_IGNORED_PARAMS = {"page", "limit", "cursor", "facets", "ordering"}
+# Фильтры, результат которых зависит от пользователя
+FACETS_USER_PARAMS = {"is_favorited", "is_in_shopping_cart"}
+
+
+def batch_response(batch_class, request):
+    """Выполняет пакетную операцию: POST добавляет связи, DELETE удаляет."""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    batch = batch_class(request.user)
+    ids = serializer.validated_data["ids"]
+    results = batch.add(ids) if request.method == "POST" else batch.remove(ids)
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
 
 class UserViewSet(UserViewSet):
     """Переопределяет вьюсет пользователя от djoser."""
@@ -99,7 +138,11 @@ class UserGetViewSet(viewsets.ViewSet):
 
         if request.method == "PUT":
             serializer = AvatarSerializer(
-                user, data=request.data, partial=True)
+                user,
+                data=request.data,
+                partial=True,
+                context={"request": request},
+            )
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(
@@ -107,7 +150,10 @@ class UserGetViewSet(viewsets.ViewSet):
 
         if request.method == "DELETE":
             if user.avatar:
-                user.avatar.delete()
+                old_avatar = user.avatar.name
+                user.avatar = None
+                user.save(update_fields=["avatar"])
+                delete_on_commit([old_avatar])
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -122,7 +168,6 @@ class UserGetViewSet(viewsets.ViewSet):
         queryset = (
             User.objects.filter(subscribers__user=current_user)
             .annotate(
-                recipes_count=Count("recipes"),
                 is_subscribed=Exists(
                     Subscription.objects.filter(
                         user=current_user, subscribed_to=OuterRef("pk")
@@ -148,71 +193,271 @@ class UserGetViewSet(viewsets.ViewSet):
     def subscribe(self, request, pk=None):
         """Подписаться или отписаться от пользователя."""
         if request.method == "POST":
-            subscribed_to = get_object_or_404(User, id=pk)
-            serializer = SubscribeActionSerializer(
-                data={"subscribed_to": subscribed_to.id},
-                context={"request": request},
+            author = get_object_or_404(User, pk=pk)
+            if author == request.user:
+                return Response(
+                    {"detail": "Нельзя подписаться на самого себя."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                with transaction.atomic():
+                    Subscription.objects.create(
+                        user=request.user, subscribed_to=author
+                    )
+            except IntegrityError:
+                return Response(
+                    {"detail": "Подписка существует."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            author.is_subscribed = True
+            serializer = SubscriptionSerializer(
+                author, context={"request": request}
             )
-            serializer.is_valid(raise_exception=True)
-            pair = serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        deleted_count, _ = Subscription.objects.filter(
+            user=request.user, subscribed_to_id=pk
+        ).delete()
+        if deleted_count == 0:
+            get_object_or_404(User.objects.only("id"), pk=pk)
             return Response(
-                SubscribeActionSerializer(pair).data,
-                status=status.HTTP_201_CREATED
+                {"detail": "Подписка не найдена."},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        if request.method == "DELETE":
-            deleted_count, _ = Subscription.objects.filter(
-                user=request.user, subscribed_to__id=pk
-            ).delete()
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="subscribe/batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def subscribe_batch(self, request):
+        """Подписаться или отписаться от нескольких авторов сразу."""
+        return batch_response(SubscriptionBatch, request)
+
+
+class UploadViewSet(viewsets.ViewSet):
+    """Загрузка изображения частями с возможностью продолжить.
+
+    POST создаёт загрузку, PATCH с заголовком Upload-Offset дописывает
+    очередную часть, GET возвращает уже загруженный объём. Готовый файл
+    передаётся в поле картинки как "upload:<token>".
+    """
+
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (JSONParser, ChunkParser)
+
+    def get_upload(self, pk):
+        upload = ChunkedUpload.get(pk, self.request.user)
+        if upload is None:
+            raise Http404
+        return upload
+
+    def upload_response(self, upload, status_code=status.HTTP_200_OK):
+        offset = upload.offset
+        response = Response(
+            {
+                "token": upload.token,
+                "size": upload.size,
+                "offset": offset,
+                "image": f"{UPLOAD_TOKEN_PREFIX}{upload.token}",
+            },
+            status=status_code,
+        )
+        response["Upload-Offset"] = offset
+        return response
 
-            if deleted_count == 0:
-                return Response(
-                    {"detail": "Подписка не найдена."},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-            return Response(status=status.HTTP_204_NO_CONTENT)
+    def create(self, request):
+        serializer = UploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = ChunkedUpload.create(
+            request.user,
+            serializer.validated_data["filename"],
+            serializer.validated_data["size"],
+        )
+        return self.upload_response(upload, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return self.upload_response(self.get_upload(pk))
+
+    def partial_update(self, request, pk=None):
+        upload = self.get_upload(pk)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Нужен заголовок Upload-Offset."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # JSON или форма иначе записались бы пустой частью
+        media_type = request.content_type.split(";")[0].strip()
+        if media_type != ChunkParser.media_type:
+            raise UnsupportedMediaType(media_type)
+        # Пустое тело парсер не вызывает, и data остаётся словарём
+        chunk = request.data if isinstance(request.data, bytes) else b""
+        upload.append(offset, chunk)
+        return self.upload_response(upload)
+
+    def destroy(self, request, pk=None):
+        self.get_upload(pk).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class MetricsView(APIView):
+    """Метрики запросов в формате Prometheus, только для админов."""
+
+    permission_classes = (IsAdminUser,)
+    renderer_classes = (PlainTextRenderer,)
+
+    def get(self, request):
+        if not settings.METRICS_ENABLED:
+            raise Http404
+        return Response(metrics.render())
+
+
+class CatalogViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """list() и retrieve() справочника из памяти процесса.
+
+    Справочники меняются только импортом и через админку, поэтому
+    читаются из get_catalog() без запросов к базе, а версия справочников
+    служит валидатором для условных запросов.
+    """
+
+    catalog_attr = None
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    pagination_class = None
+
+    def get_etag_data(self, request):
+        return f"{get_catalog_version()}:{request.get_full_path()}"
+
+    def get_last_modified(self, request):
+        return get_catalog_version()
+
+    def get_catalog_items(self):
+        return getattr(get_catalog(), self.catalog_attr)
+
+    def filter_catalog(self, items):
+        return items
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            self.filter_catalog(self.get_catalog_items().values()),
+            many=True,
+        )
+        return Response(serializer.data)
+
+    def get_object(self):
+        try:
+            obj = self.get_catalog_items()[int(self.kwargs["pk"])]
+        except (KeyError, ValueError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class TagViewSet(CatalogViewSet):
     """list() и retrieve() для модели Tag."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
-    permission_classes = (IsAuthenticatedOrReadOnly,)
-    pagination_class = None
+    catalog_attr = "tags"
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogViewSet):
     """list() и retrieve() для модели Ingridient."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    permission_classes = (IsAuthenticatedOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
-    pagination_class = None
+    catalog_attr = "ingredients"
+    conditional_actions = ("list", "retrieve", "autocomplete")
+
+    def filter_catalog(self, items):
+        """Поиск по части названия, совпадения по началу — первыми."""
+        name = self.request.query_params.get("name")
+        if name:
+            return get_catalog().ingredient_index.search(name)
+        return items
+
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """Подсказки ингредиентов для редактора рецепта."""
+        query = request.query_params.get("name", "").strip()
+        if not query:
+            return Response([], status=status.HTTP_200_OK)
+        try:
+            limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+        return Response(
+            autocomplete_ingredients(query, limit), status=status.HTTP_200_OK
+        )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """CRUD для модели Recipe."""
 
-    filter_backends = (DjangoFilterBackend,)
+    # Картинку можно передать файлом: JSON рецепта в части data
+    parser_classes = (JSONParser, MultipartJsonParser)
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ("pub_date", "favorites_count")
+    ordering_tie_breaker = ("-pub_date", "-id")
+    pagination_class = RecipePagination
+    conditional_actions = ("retrieve",)
+    # is_favorited, is_in_shopping_cart и is_subscribed зависят от токена
+    conditional_vary = ("Authorization",)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             return [AllowAny()]
-        return [IsAuthorOrStaff()]
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            return [IsAuthorOrStaff()]
+        # Дополнительные действия задают права в декораторе @action
+        return super().get_permissions()
+
+    def get_object(self):
+        # Объект нужен и для ETag, и для ответа — читаем его один раз
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    def get_etag_data(self, request):
+        recipe = self.get_object()
+        return ":".join(str(part) for part in (
+            recipe.pk,
+            recipe.updated_at.timestamp(),
+            get_catalog_version(),
+            getattr(recipe, "is_favorited", False),
+            getattr(recipe, "is_in_shopping_cart", False),
+            getattr(recipe, "author_is_subscribed", False),
+        ))
+
+    def get_last_modified(self, request):
+        # Отметки пользователя не меняют updated_at, поэтому дата изменения
+        # отдаётся только анонимам
+        if request.user.is_authenticated:
+            return None
+        return max(
+            self.get_object().updated_at.timestamp(), get_catalog_version()
+        )
 
     def get_queryset(self):
         user = (
             self.request.user if self.request.user.is_authenticated else None
         )
-        queryset = Recipe.objects.prefetch_related(
-            "ingredients", "tags").select_related("author")
+        # Теги и ингредиенты догружаются сериализатором только для
+        # рецептов, которых нет в кеше
+        queryset = Recipe.objects.select_related("author")
 
         if user:
             queryset = queryset.annotate(
+                author_is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user,
+                        subscribed_to=OuterRef("author"))
+                ),
                 is_favorited=Exists(
                     Favorite.objects.filter(
                         user=user,
@@ -226,6 +471,45 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        facets = request.query_params.get("facets", "").split(",")
+        if "tags" in facets:
+            response.data["facets"] = {"tags": self.get_tag_facets()}
+        return response
+
+    def get_tag_facets(self):
+        """Количество рецептов по каждому тегу при текущих фильтрах.
+
+        Считается одним агрегирующим запросом и ненадолго кешируется по
+        набору фильтров (и пользователю, если фильтры от него зависят).
+        """
+        params = sorted(
+            (key, value)
+            for key, value in self.request.query_params.lists()
+            if key not in FACETS_IGNORED_PARAMS
+        )
+        if any(key in FACETS_USER_PARAMS for key, _ in params):
+            params.append(("user", [self.request.user.pk]))
+        key = "recipes:facets:tags:" + hashlib.md5(
+            urlencode(params, doseq=True).encode()
+        ).hexdigest()
+        facets = cache.get(key)
+        if facets is None:
+            recipes = self.filter_queryset(
+                self.get_queryset()
+            ).order_by().values("pk")
+            facets = list(
+                Tag.objects.annotate(
+                    count=Count(
+                        "tag_recipes",
+                        filter=Q(tag_recipes__recipe__in=recipes),
+                    )
+                ).values("id", "name", "slug", "count").order_by("id")
+            )
+            cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+        return facets
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -235,70 +519,165 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def shopping_cart(self, request, pk=None):
         """Добавление или удаление рецепта из корзины."""
         if request.method == "POST":
-            # Добавление в корзину
-            recipe = get_object_or_404(Recipe, id=pk)
-            serializer = ShoppingCartSerializer(
-                data={"recipe": recipe.id}, context={"request": request}
+            return self.add_recipe_relation(
+                ShoppingCart, pk, "Рецепт уже есть в списке покупок."
             )
-            serializer.is_valid(raise_exception=True)
-            cart_item = serializer.save()
+        return self.remove_recipe_relation(
+            ShoppingCart, pk, "Рецепта нет в корзине."
+        )
+
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="shopping_cart/batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_batch(self, request):
+        """Добавление или удаление нескольких рецептов из корзины."""
+        return batch_response(ShoppingCartBatch, request)
+
+    def add_recipe_relation(self, model, pk, exists_message):
+        """Связывает рецепт с пользователем: Избранное или корзина.
+
+        Повтор ловится уникальным ограничением, а не предварительной
+        проверкой, поэтому одновременные запросы дают 400, а не 500.
+        """
+        recipe = get_object_or_404(
+            Recipe.objects.only(
+                "id", "name", "image", "image_small", "image_medium",
+                "cooking_time",
+            ),
+            pk=pk,
+        )
+        try:
+            with transaction.atomic():
+                model.objects.create(user=self.request.user, recipe=recipe)
+        except IntegrityError:
             return Response(
-                ShoppingCartSerializer(cart_item).data,
-                status=status.HTTP_201_CREATED,
+                {"detail": exists_message}, status=status.HTTP_400_BAD_REQUEST
             )
+        return Response(
+            RecipeRepresentation(recipe).data, status=status.HTTP_201_CREATED
+        )
 
-        if request.method == "DELETE":
-            # Удаление из корзины
-            deleted_count, _ = ShoppingCart.objects.filter(
-                user=request.user, recipe_id=pk
-            ).delete()
+    def remove_recipe_relation(self, model, pk, missing_message):
+        """Удаляет связь рецепта с пользователем.
+
+        Рецепт проверяется только если удалять было нечего: 404 для
+        несуществующего рецепта, 400 — если его не добавляли.
+        """
+        deleted_count, _ = model.objects.filter(
+            user=self.request.user, recipe_id=pk
+        ).delete()
+        if deleted_count == 0:
+            get_object_or_404(Recipe.objects.only("id"), pk=pk)
+            return Response(
+                {"detail": missing_message},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-            if deleted_count == 0:
-                return Response(
-                    {"detail": "Рецепта нет в корзине."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            return Response(status=status.HTTP_204_NO_CONTENT)
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="batch",
+        permission_classes=[AllowAny],
+    )
+    def batch(self, request):
+        """Несколько рецептов по ?ids=1,2,3 в порядке запроса."""
+        serializer = RecipeIdsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        recipes = self.get_queryset().in_bulk(ids)
+        results = RecipeReadSerializer(
+            [recipes[pk] for pk in ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(
+            {
+                "results": results.data,
+                "missing": [pk for pk in ids if pk not in recipes],
+            },
+            status=status.HTTP_200_OK,
+        )
 
     @action(
         detail=False,
         methods=["get"],
-        url_path="download_shopping_cart",
+        url_path="feed",
         permission_classes=[IsAuthenticated],
-        renderer_classes=[PlainTextRenderer],
     )
-    def download_shopping_cart(self, request):
-        """Метод для скачивания списка покупок."""
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__shoppingcart__user=request.user
-        ).select_related("ingredient")
-
-        content = self.create_file(ingredients)
-
-        response = Response(content)
-        response[
-            "Content-Disposition"
-        ] = 'attachment; filename="products_list.txt"'
-        return response
-
-    def create_file(self, ingredients):
-        """Создает содержимое файла на основе элементов корзины."""
-        in_cart = {}
+    def feed(self, request):
+        """Новые рецепты авторов, на которых подписан пользователь."""
+        paginator = FeedPagination()
+        entries = paginator.paginate_queryset(
+            FeedEntry.objects.filter(user=request.user), request, view=self
+        )
+        recipes = self.get_queryset().in_bulk(
+            [entry.recipe_id for entry in entries]
+        )
+        serializer = RecipeReadSerializer(
+            [
+                recipes[entry.recipe_id]
+                for entry in entries
+                if entry.recipe_id in recipes
+            ],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
 
-        for ingredient in ingredients:
-            ingredient_name = ingredient.ingredient.name
-            measurement_unit = ingredient.ingredient.measurement_unit
-            amount = ingredient.amount
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="shopping_cart/summary",
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_summary(self, request):
+        """Суммарный список ингредиентов из корзины."""
+        items = ShoppingListItem.objects.filter(
+            user=request.user
+        ).select_related("ingredient").order_by("ingredient__name")
+        serializer = ShoppingListItemSerializer(items, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-            in_cart[(ingredient_name, measurement_unit)] = (
-                in_cart.get((ingredient_name, measurement_unit), 0) + amount
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="download_shopping_cart",
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            PlainTextRenderer,
+            CSVRenderer,
+            ShoppingListJSONRenderer,
+            PrintableTextRenderer,
+        ],
+    )
+    def download_shopping_cart(self, request):
+        """Скачивание списка покупок в формате из ?format=.
+
+        Суммы берутся из материализованного списка покупок, а файл
+        отдаётся потоком по мере чтения строк из базы.
+        """
+        ingredients = (
+            ShoppingListItem.objects.filter(user=request.user)
+            .values(
+                name=F("ingredient__name"),
+                measurement_unit=F("ingredient__measurement_unit"),
+                total=F("amount"),
             )
-
-        cart = [
-            f"{key[0]} - {value}({key[1]})" for key, value in in_cart.items()
-        ]
-        content = "\n".join(cart)
-        return content
+            .order_by("name")
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator()),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="products_list.{renderer.extension}"'
+        )
+        return response
 
     @action(
         detail=True,
@@ -309,28 +688,22 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def favorite(self, request, pk=None):
         """Добавление или удаление рецепта в Избранное."""
         if request.method == "POST":
-            recipe = get_object_or_404(Recipe, id=pk)
-            serializer = FavoriteSerializer(
-                data={"recipe": recipe.id}, context={"request": request}
-            )
-            serializer.is_valid(raise_exception=True)
-            fav_item = serializer.save()
-            return Response(
-                FavoriteSerializer(fav_item).data,
-                status=status.HTTP_201_CREATED,
+            return self.add_recipe_relation(
+                Favorite, pk, "Рецепт уже есть в Избранном."
             )
+        return self.remove_recipe_relation(
+            Favorite, pk, "Рецепта нет в Избранном."
+        )
 
-        if request.method == "DELETE":
-            deleted_count, _ = Favorite.objects.filter(
-                user=request.user, recipe_id=pk
-            ).delete()
-
-            if deleted_count == 0:
-                return Response(
-                    {"detail": "Рецепта нет в Избранном."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            return Response(status=status.HTTP_204_NO_CONTENT)
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        url_path="favorite/batch",
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_batch(self, request):
+        """Добавление или удаление нескольких рецептов в Избранное."""
+        return batch_response(FavoriteBatch, request)
 
     @action(detail=True, methods=["get"], url_path="get-link")
     def get_link(self, request, pk=None):
@@ -352,6 +725,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
 def short_link_redirect(request, short_link):
     """Перенаправляет по короткой ссылке на страницу рецепта."""
-    recipe = get_object_or_404(Recipe, short_link=short_link)
-    recipe_url = f"{settings.BASE_URL}/recipes/{recipe.id}/"
+    recipe_id = resolve_short_link(short_link)
+    if recipe_id is None:
+        raise Http404
+    recipe_url = f"{settings.BASE_URL}/recipes/{recipe_id}/"
     return redirect(recipe_url)
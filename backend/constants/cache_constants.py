@@ -0,0 +1,16 @@
+# Время жизни закешированного представления рецепта (в секундах)
+RECIPE_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни закешированных подсказок ингредиентов (в секундах)
+AUTOCOMPLETE_CACHE_TIMEOUT = 5 * 60
+
+# Время жизни закешированных фасетов по тегам (в секундах)
+FACETS_CACHE_TIMEOUT = 30
+
+# Размер кеша коротких ссылок в памяти процесса и время жизни записи
+# (в секундах)
+SHORT_LINK_CACHE_SIZE = 10000
+SHORT_LINK_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни закешированного пользователя токена (в секундах)
+AUTH_TOKEN_CACHE_TIMEOUT = 60
@@ -0,0 +1,32 @@
+# Максимальный размер загружаемого изображения (в байтах)
+IMAGE_MAX_SIZE = 5 * 1024 * 1024
+
+# Размер части base64 при декодировании, кратен 4
+BASE64_CHUNK_SIZE = 64 * 1024
+
+# Поля миниатюр рецепта и их ширина в пикселях
+THUMBNAIL_SIZES = (
+    ("image_small", 320),
+    ("image_medium", 800),
+)
+
+# Формат, расширение и качество миниатюр
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_EXTENSION = "webp"
+THUMBNAIL_QUALITY = 80
+
+# Количество потоков, нарезающих миниатюры
+THUMBNAIL_WORKERS = 2
+
+# Максимальный размер одной части при загрузке частями (в байтах)
+UPLOAD_CHUNK_MAX_SIZE = 1024 * 1024
+
+# Время жизни незавершённой загрузки (в секундах)
+UPLOAD_TIMEOUT = 24 * 60 * 60
+
+# Сколько незавершённых загрузок может быть у одного пользователя
+UPLOADS_PER_USER_MAX = 5
+
+# Как часто процесс удаляет просроченные загрузки всех пользователей
+# (в секундах)
+UPLOADS_CLEAR_INTERVAL = 60 * 60
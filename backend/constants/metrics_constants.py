@@ -0,0 +1,8 @@
+# Границы корзин гистограммы длительности запроса (в секундах)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Границы корзин гистограммы числа SQL-запросов на запрос
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Границы корзин гистограммы размера ответа (в байтах)
+RESPONSE_SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
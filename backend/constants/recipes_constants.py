@@ -21,3 +21,23 @@ COOKING_TIME = 1
 
 # Минимальное количество для ингредиента
 MIN_AMOUNT = 1
+
+# Количество строк на странице списка покупок для печати
+SHOPPING_LIST_PAGE_LINES = 40
+
+# Количество подсказок ингредиентов по умолчанию и максимальное
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Конфигурация полнотекстового поиска PostgreSQL
+SEARCH_CONFIG = "russian"
+
+# Множитель для перемешивания id в короткой ссылке. Взаимно прост с числом
+# возможных ссылок, поэтому разные id дают разные ссылки
+SHORT_LINK_MULTIPLIER = 912716380087
+
+# Максимальное количество записей в ленте подписок пользователя
+FEED_MAX_ENTRIES = 500
+
+# Максимальное количество id в одном пакетном запросе
+BATCH_MAX_SIZE = 100
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -33,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.MetricsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,6 +75,35 @@ DATABASES = {
     }
 }
 
+# При нескольких воркерах нужен общий для них бэкенд кеша
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    # Метки версий читают все воркеры и management-команды,
+    # поэтому этот кеш должен быть общим для процессов
+    "shared": {
+        "BACKEND": os.getenv(
+            "SHARED_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv(
+            "SHARED_CACHE_LOCATION", "/tmp/foodgram_cache"
+        ),
+    },
+    # Кеш аутентификации по токенам. Нужен общий для процессов сетевой
+    # кеш (memcached, Redis): файловый кеш на каждом запросе медленнее
+    # запроса токена к базе. Без AUTH_CACHE_BACKEND кеш не используется
+    "auth": {
+        "BACKEND": os.getenv("AUTH_CACHE_BACKEND")
+        or "django.core.cache.backends.dummy.DummyCache",
+        "LOCATION": os.getenv("AUTH_CACHE_LOCATION", ""),
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -106,6 +137,15 @@ STATIC_ROOT = BASE_DIR / "collected_static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/app/media/"
 
+# Файлы именуются по хешу содержимого, одинаковые загрузки не дублируются
+DEFAULT_FILE_STORAGE = "foodgram_backend.storage.HashedFileSystemStorage"
+
+# Каталог для файлов, загружаемых частями. На том же разделе, что и
+# MEDIA_ROOT, готовый файл перемещается в хранилище без копирования
+UPLOADS_DIR = os.getenv(
+    "UPLOADS_DIR", os.path.join(tempfile.gettempdir(), "foodgram_uploads")
+)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.FoodgramUser'
@@ -115,7 +155,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -124,6 +164,12 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": DEFAULT_PAGE_SIZE,
 }
 
+# Сбор метрик запросов для /api/metrics/
+METRICS_ENABLED = os.getenv("METRICS_ENABLED") == "True"
+
+# Максимальное количество рецептов в одном запросе /api/recipes/batch/
+RECIPES_BATCH_MAX_IDS = int(os.getenv("RECIPES_BATCH_MAX_IDS", 50))
+
 DJOSER = {
     "USERNAME_FIELD": "email",
     "SERIALIZERS": {
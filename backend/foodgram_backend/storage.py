@@ -0,0 +1,81 @@
+import hashlib
+import os
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import F
+
+
+def content_hash(content):
+    """SHA-256 содержимого файла, читаемого частями."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Хранилище, именующее файлы по хешу содержимого.
+
+    Файл сохраняется как <каталог upload_to>/<sha256>.<расширение>, поэтому
+    одинаковые загрузки хранятся один раз, а содержимое по URL никогда не
+    меняется и nginx отдаёт /media/ с долгим кешированием.
+
+    Ссылки на файл считаются в recipes.StoredFile: save() добавляет ссылку
+    в транзакции, сохраняющей запись, delete() снимает её. Строка счётчика
+    блокируется в обоих случаях, поэтому удаление последней ссылки не
+    пересекается с повторным использованием того же файла.
+    """
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, content_hash(content) + extension)
+        with transaction.atomic():
+            stored = self.lock(name, create=True)
+            stored.references = F("references") + 1
+            stored.save(update_fields=["references"])
+            if not self.exists(name):
+                return super()._save(name, content)
+        # Временный файл обычно перемещается в хранилище, здесь он не нужен
+        if hasattr(content, "temporary_file_path"):
+            try:
+                os.remove(content.temporary_file_path())
+            except FileNotFoundError:
+                pass
+        return name
+
+    def delete(self, name):
+        """Снимает ссылку и удаляет файл, если ссылок не осталось."""
+        if not name:
+            return
+        with transaction.atomic():
+            stored = self.lock(name)
+            if stored is not None and stored.references > 1:
+                stored.references = F("references") - 1
+                stored.save(update_fields=["references"])
+                return
+            if stored is not None:
+                stored.delete()
+            super().delete(name)
+
+    @staticmethod
+    def lock(name, create=False):
+        """Строка счётчика ссылок на файл, заблокированная до конца
+        транзакции."""
+        files = apps.get_model("recipes", "StoredFile").objects
+        if create:
+            return files.select_for_update().get_or_create(name=name)[0]
+        return files.select_for_update().filter(name=name).first()
+
+
+def delete_on_commit(names, storage=default_storage):
+    """Снимает ссылки на прежние файлы после фиксации транзакции."""
+    names = [name for name in names if name]
+
+    def delete():
+        for name in names:
+            storage.delete(name)
+
+    transaction.on_commit(delete)
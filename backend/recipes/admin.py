@@ -1,7 +1,9 @@
 from django.contrib import admin
 
+from foodgram_backend.storage import delete_on_commit
 from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                            ShoppingCart, Tag, TagRecipe)
+                            ShoppingCart, ShoppingListItem, Tag, TagRecipe)
+from recipes.thumbnails import schedule_thumbnails
 
 
 class TagRecipeInline(admin.TabularInline):
@@ -19,14 +21,49 @@ class IngredientRecipeInline(admin.TabularInline):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     inlines = (TagRecipeInline, IngredientRecipeInline)
-    list_display = ("name", "author", "favorite_count_display")
+    list_display = ("name", "author", "favorites_count")
     search_fields = ("author__username", "name")
     list_filter = ("tags",)
-    readonly_fields = ("favorite_count_display", "short_link")
-
-    @admin.display(description="Добавили в Избранное")
-    def favorite_count_display(self, obj):
-        return obj.favorited_by.count()
+    readonly_fields = ("favorites_count", "short_link")
+
+    def save_model(self, request, obj, form, change):
+        """Снимает ссылки на прежнюю картинку и её миниатюры при смене
+        картинки."""
+        image_changed = "image" in form.changed_data
+        if image_changed:
+            old_image = form.initial.get("image")
+            delete_on_commit([
+                old_image.name if old_image else "",
+                obj.image_small.name,
+                obj.image_medium.name,
+            ])
+            obj.image_small = obj.image_medium = ""
+        super().save_model(request, obj, form, change)
+        if image_changed:
+            schedule_thumbnails(obj)
+
+    def save_related(self, request, form, formsets, change):
+        """Пересчитывает списки покупок, в корзинах которых есть рецепт."""
+        recipe = form.instance
+        ingredient_ids = set(
+            IngredientRecipe.objects.filter(recipe=recipe).values_list(
+                "ingredient", flat=True
+            )
+        )
+        super().save_related(request, form, formsets, change)
+        if not change:
+            return
+        ingredient_ids.update(
+            IngredientRecipe.objects.filter(recipe=recipe).values_list(
+                "ingredient", flat=True
+            )
+        )
+        ShoppingListItem.objects.refresh(
+            ShoppingCart.objects.filter(recipe=recipe).values_list(
+                "user", flat=True
+            ),
+            ingredient_ids,
+        )
 
 
 @admin.register(Tag)
@@ -63,3 +100,9 @@ class FavoriteAdmin(admin.ModelAdmin):
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ("user", "ingredient", "amount")
+    search_fields = ("user__username", "ingredient__name")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import clear_uploads
+
+
+class Command(BaseCommand):
+    help = "Удаление просроченных и использованных загрузок по частям"
+
+    def handle(self, *args, **options):
+        removed = clear_uploads()
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено загрузок: {removed}."
+        ))
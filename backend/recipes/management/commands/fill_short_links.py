@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipes.models import Recipe
+from recipes.short_links import encode_short_link
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполнение коротких ссылок рецептов, у которых их нет. "
+        "Уже выданные ссылки не меняются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.filter(
+            Q(short_link__isnull=True) | Q(short_link="")
+        ).only("id", "short_link").order_by("id")
+        updated = 0
+        batch = []
+        for recipe in recipes.iterator(chunk_size=options["batch_size"]):
+            recipe.short_link = encode_short_link(recipe.pk)
+            batch.append(recipe)
+            if len(batch) == options["batch_size"]:
+                Recipe.objects.bulk_update(batch, ["short_link"])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Recipe.objects.bulk_update(batch, ["short_link"])
+            updated += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"Короткие ссылки заполнены: {updated}."
+        ))
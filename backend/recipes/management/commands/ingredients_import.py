@@ -1,89 +1,142 @@
 import csv
+import json
 import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
+from api.cache import bump_catalog_version
 from recipes.models import Ingredient, Tag
 
+DEFAULT_DATA_PATH = "/app/data"
+DEFAULT_BATCH_SIZE = 1000
+READ_EXTENSIONS = (".csv", ".jsonl", ".json")
 
-class Command(BaseCommand):
-    help = "Импорт ингредиентов и тегов из CSV в базу данных"
 
-    def handle(self, *args, **options):
-        data_path = "/app/data"
-
-        # Импорт ингредиентов
-        ingredients_path = os.path.join(data_path, "ingredients.csv")
-        if os.path.exists(ingredients_path):
-            self.import_ingredients(ingredients_path)
-        else:
-            self.stdout.write(self.style.ERROR(
-                f"Файл {ingredients_path} не найден!")
-            )
-
-        # Импорт тегов
-        tags_path = os.path.join(data_path, "tags.csv")
-        if os.path.exists(tags_path):
-            self.import_tags(tags_path)
-        else:
-            self.stdout.write(self.style.ERROR(f"Файл {tags_path} не найден!"))
+def read_csv(file, fields):
+    """Читает строки CSV, сопоставляя колонки с полями по порядку."""
+    for row in csv.reader(file):
+        if len(row) != len(fields):
+            yield row
+            continue
+        yield dict(zip(fields, row))
 
-        self.stdout.write(self.style.SUCCESS("Импорт данных завершён!"))
 
-    def import_ingredients(self, file_path):
-        """Импорт ингредиентов из CSV."""
-        with open(file_path, encoding="utf-8") as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if len(row) != 2:
-                    # Проверяем,
-                    # чтобы было 2 колонки (название, ед. измерения)
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"Ошибка в строке (ингредиенты): {row}"
-                        )
-                    )
-                    continue
+def read_jsonl(file, fields):
+    """Читает JSON Lines построчно, не загружая файл целиком."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(file, fields):
+    """Читает JSON-массив объектов."""
+    yield from json.load(file)
 
-                name, measurement_unit = row
-                ingredient, created = Ingredient.objects.get_or_create(
-                    name=name, defaults={"measurement_unit": measurement_unit}
-                )
 
-                # Дебаг-логирование (по желанию)
-                # if created:
-                #     self.stdout.write(self.style.SUCCESS(
-                # f"Добавлен ингредиент: {name}"))
-                # else:
-                #     self.stdout.write(self.style.WARNING(
-                # f"Ингредиент {name} уже существует."))
+READERS = {".csv": read_csv, ".jsonl": read_jsonl, ".json": read_json}
 
-        self.stdout.write(self.style.SUCCESS("Импорт ингредиентов завершён!"))
 
-    def import_tags(self, file_path):
-        """Импорт тегов из CSV."""
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Импорт ингредиентов и тегов из CSV, JSON или JSONL в базу данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=DEFAULT_DATA_PATH,
+            help="Каталог с файлами ingredients.* и tags.*",
+        )
+        parser.add_argument("--ingredients", help="Файл с ингредиентами")
+        parser.add_argument("--tags", help="Файл с тегами")
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Показать, что будет добавлено, не изменяя базу",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.dry_run = options["dry_run"]
+        self.verbosity = options["verbosity"]
+        created = 0
+
+        for model, name, fields, key_fields in (
+            (
+                Ingredient,
+                "ingredients",
+                ("name", "measurement_unit"),
+                ("name", "measurement_unit"),
+            ),
+            (Tag, "tags", ("name", "slug"), ("slug",)),
+        ):
+            file_path = options[name] or self.find_file(options["path"], name)
+            if file_path is None or not os.path.exists(file_path):
+                self.stdout.write(self.style.ERROR(
+                    f"Файл {file_path or name} не найден!"
+                ))
+                continue
+            created += self.import_file(model, file_path, fields, key_fields)
+
+        if created and not self.dry_run:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS("Импорт данных завершён!"))
+
+    def find_file(self, data_path, name):
+        for extension in READ_EXTENSIONS:
+            file_path = os.path.join(data_path, name + extension)
+            if os.path.exists(file_path):
+                return file_path
+        return None
+
+    def import_file(self, model, file_path, fields, key_fields):
+        """Пакетно добавляет записи из файла, пропуская существующие."""
+        extension = os.path.splitext(file_path)[1]
+        if extension not in READERS:
+            raise CommandError(f"Неподдерживаемый формат файла: {file_path}")
+
+        started = time.monotonic()
+        existing = set(model.objects.values_list(*key_fields))
+        total = created = 0
         with open(file_path, encoding="utf-8") as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if len(row) != 2:
-                    # Проверяем,
-                    # чтобы было 2 колонки (название, slug)
-                    self.stdout.write(
-                        self.style.ERROR(f"Ошибка в строке (теги): {row}")
+            rows = READERS[extension](file, fields)
+            for batch in batched(rows, self.batch_size):
+                new_objects = []
+                for row in batch:
+                    total += 1
+                    if not isinstance(row, dict) or set(row) != set(fields):
+                        self.stdout.write(self.style.ERROR(
+                            f"Ошибка в строке ({file_path}): {row}"
+                        ))
+                        continue
+                    key = tuple(row[field] for field in key_fields)
+                    if key in existing:
+                        continue
+                    existing.add(key)
+                    new_objects.append(model(**row))
+                    if self.dry_run and self.verbosity > 1:
+                        self.stdout.write(f"+ {row}")
+                if not self.dry_run:
+                    # Конфликты возможны при параллельном импорте
+                    model.objects.bulk_create(
+                        new_objects, ignore_conflicts=True
                     )
-                    continue
-
-                name, slug = row
-                tag, created = Tag.objects.get_or_create(
-                    name=name, defaults={"slug": slug}
-                )
-
-                # Дебаг-логирование (по желанию)
-                # if created:
-                #     self.stdout.write(
-                # self.style.SUCCESS(f"Добавлен тег: {name} ({slug})"))
-                # else:
-                #     self.stdout.write(self.style.WARNING(
-                # f"Тег {name} ({slug}) уже существует."))
-
-        self.stdout.write(self.style.SUCCESS("Импорт тегов завершён!"))
+                created += len(new_objects)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        action = "Будет добавлено" if self.dry_run else "Добавлено"
+        self.stdout.write(self.style.SUCCESS(
+            f"{model._meta.verbose_name_plural}: {action} {created} "
+            f"из {total} строк за {elapsed:.2f} с "
+            f"({total / elapsed:.0f} строк/с)"
+        ))
+        return created
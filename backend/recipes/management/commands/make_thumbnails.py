@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.thumbnails import make_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Создание миниатюр для рецептов, у которых их ещё нет"
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.filter(image_small="").exclude(image="")
+        done = failed = 0
+        for recipe_id, image_name in recipes.values_list("id", "image"):
+            try:
+                make_thumbnails(recipe_id, image_name)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f"Рецепт {recipe_id}: {error}")
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Миниатюры созданы: {done}, с ошибками: {failed}."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = "Пересборка материализованных списков покупок из корзин"
+
+    def handle(self, *args, **options):
+        created = ShoppingListItem.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Списки покупок пересобраны, позиций: {created}."
+        ))
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import count_subquery
+from recipes.models import Favorite, Recipe
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Пересчёт счётчиков избранного, рецептов и подписчиков"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.update(
+            favorites_count=count_subquery(Favorite.objects.all(), "recipe")
+        )
+        users = User.objects.update(
+            recipes_count=count_subquery(Recipe.objects.all(), "author"),
+            subscribers_count=count_subquery(
+                Subscription.objects.all(), "subscribed_to"
+            ),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Счётчики пересчитаны: рецептов {recipes}, "
+            f"пользователей {users}."
+        ))
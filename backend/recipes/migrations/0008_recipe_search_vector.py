@@ -0,0 +1,64 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:03
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', coalesce({table}.name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce({table}.text, '')), 'B')"
+)
+
+
+def create_search_trigger(apps, schema_editor):
+    # Поисковый вектор поддерживается только на PostgreSQL, остальные базы
+    # ищут по name и text через icontains
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS recipe_search_vector_idx "
+        "ON recipes_recipe USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "CREATE OR REPLACE FUNCTION recipe_search_vector_update() "
+        "RETURNS trigger AS $$ BEGIN "
+        f"NEW.search_vector := {SEARCH_VECTOR_SQL.format(table='NEW')}; "
+        "RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    schema_editor.execute(
+        "CREATE TRIGGER recipe_search_vector_trigger "
+        "BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe "
+        "FOR EACH ROW EXECUTE FUNCTION recipe_search_vector_update()"
+    )
+    schema_editor.execute(
+        "UPDATE recipes_recipe SET search_vector = "
+        f"{SEARCH_VECTOR_SQL.format(table='recipes_recipe')}"
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS recipe_search_vector_trigger "
+        "ON recipes_recipe"
+    )
+    schema_editor.execute(
+        "DROP FUNCTION IF EXISTS recipe_search_vector_update()"
+    )
+    schema_editor.execute("DROP INDEX IF EXISTS recipe_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_link',
+            field=models.CharField(blank=True, max_length=7, null=True, unique=True, verbose_name='Короткая ссылка'),
+        ),
+    ]
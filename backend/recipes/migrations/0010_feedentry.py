@@ -0,0 +1,76 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FEED_MAX_ENTRIES = 500
+
+
+def fill_feeds(apps, schema_editor):
+    Subscription = apps.get_model("users", "Subscription")
+    Recipe = apps.get_model("recipes", "Recipe")
+    FeedEntry = apps.get_model("recipes", "FeedEntry")
+    feeds = {}
+    for user_id, author_id in Subscription.objects.values_list(
+        "user_id", "subscribed_to_id"
+    ):
+        recipes = (
+            Recipe.objects.filter(author_id=author_id)
+            .order_by("-pub_date", "-id")
+            .values_list("pk", "pub_date")[:FEED_MAX_ENTRIES]
+        )
+        feeds.setdefault(user_id, []).extend(
+            (pub_date, recipe_id, author_id)
+            for recipe_id, pub_date in recipes
+        )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id, entries in feeds.items()
+            for pub_date, recipe_id, author_id in sorted(
+                entries, reverse=True
+            )[:FEED_MAX_ENTRIES]
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0009_recipe_short_link_null'),
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-recipe'], name='feed_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:33
+
+from collections import Counter
+
+from django.db import migrations, models
+
+# Поля, файлы которых лежат в хранилище с подсчётом ссылок
+FILE_FIELDS = (
+    ("recipes", "Recipe", ("image", "image_small", "image_medium")),
+    ("users", "FoodgramUser", ("avatar",)),
+)
+
+
+def count_references(apps, schema_editor):
+    StoredFile = apps.get_model("recipes", "StoredFile")
+    references = Counter()
+    for app_label, model_name, fields in FILE_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        for field in fields:
+            references.update(
+                model.objects.exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .values_list(field, flat=True)
+                .iterator()
+            )
+    StoredFile.objects.bulk_create(
+        (
+            StoredFile(name=name, references=count)
+            for name, count in references.items()
+        ),
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_thumbnails'),
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('references', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+            ],
+            options={
+                'verbose_name': 'Файл',
+                'verbose_name_plural': 'Файлы',
+            },
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,52 @@
-import uuid
-
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
-
-from constants.recipes_constants import (COOKING_TIME, LENGTH_INGREDIENT,
-                                         LENGTH_MESURE_UNIT, LENGTH_TAG,
-                                         LENGTH_TO_DISPLAY, MIN_AMOUNT,
-                                         RECIPE_NAME_LENGTH, SHORT_LINK_LENGTH)
+from django.db import connections, models, transaction
+from django.db.models import F, Sum
+
+from constants.recipes_constants import (COOKING_TIME, FEED_MAX_ENTRIES,
+                                         LENGTH_INGREDIENT, LENGTH_MESURE_UNIT,
+                                         LENGTH_TAG, LENGTH_TO_DISPLAY,
+                                         MIN_AMOUNT, RECIPE_NAME_LENGTH,
+                                         SHORT_LINK_LENGTH)
+from recipes.short_links import encode_short_link
 from recipes.validators import validate_slug
 
 User = get_user_model()
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Выборки рецептов."""
+
+    def latest_by_authors(self, author_ids, limit=None):
+        """Возвращает до limit новейших рецептов каждого автора.
+
+        Рецепты всех авторов выбираются одним запросом с ROW_NUMBER():
+        ORM этой версии Django не умеет фильтровать по оконной функции.
+        """
+        author_ids = list(author_ids)
+        if not author_ids or limit is not None and limit < 1:
+            return {author_id: [] for author_id in author_ids}
+        table = self.model._meta.db_table
+        sql = (
+            f"SELECT * FROM (SELECT id, author_id, name, image, image_small,"
+            f" image_medium, cooking_time,"
+            f" ROW_NUMBER() OVER (PARTITION BY author_id"
+            f" ORDER BY pub_date DESC, id DESC) AS position"
+            f" FROM {table} WHERE author_id IN"
+            f" ({', '.join(['%s'] * len(author_ids))})) ranked"
+        )
+        params = author_ids
+        if limit is not None:
+            sql += " WHERE position <= %s"
+            params = [*author_ids, limit]
+        sql += " ORDER BY author_id, position"
+        recipes = {author_id: [] for author_id in author_ids}
+        for recipe in self.raw(sql, params):
+            recipes[recipe.author_id].append(recipe)
+        return recipes
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -24,6 +58,15 @@ class Recipe(models.Model):
     image = models.ImageField(
         upload_to="recipes/images/", verbose_name="Картинка"
     )
+    # Уменьшенные копии картинки создаются в фоне (recipes/thumbnails.py)
+    image_small = models.ImageField(
+        "Миниатюра", upload_to="recipes/thumbnails/", blank=True,
+        editable=False,
+    )
+    image_medium = models.ImageField(
+        "Средняя картинка", upload_to="recipes/thumbnails/", blank=True,
+        editable=False,
+    )
     text = models.TextField("Описание")
     ingredients = models.ManyToManyField(
         "Ingredient",
@@ -48,23 +91,47 @@ class Recipe(models.Model):
         ],
     )
     pub_date = models.DateTimeField("Дата публикации", auto_now_add=True)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
     short_link = models.CharField(
         "Короткая ссылка",
         max_length=SHORT_LINK_LENGTH,
         unique=True,
         blank=True,
+        # Ссылка вычисляется из id, поэтому до вставки строки её ещё нет
+        null=True,
+    )
+    favorites_count = models.PositiveIntegerField(
+        "Добавили в Избранное", default=0, editable=False
     )
+    # На PostgreSQL заполняется триггером из name и text
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["-favorites_count"], name="recipe_favorites_count_idx"
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        """Генерирует уникальную короткую ссылку на рецепт."""
-        if not self.short_link:
-            self.short_link = str(uuid.uuid4())[:SHORT_LINK_LENGTH]
-        super().save(*args, **kwargs)
+        """Генерирует уникальную короткую ссылку на рецепт по его id."""
+        if self.short_link:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.short_link = encode_short_link(self.pk)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_link=self.short_link
+            )
 
     def __str__(self):
         return self.name[:LENGTH_TO_DISPLAY]
@@ -89,16 +156,16 @@ class Ingredient(models.Model):
     measurement_unit = models.CharField(
         "Единица измерения", max_length=LENGTH_MESURE_UNIT
     )
-    constraints = [
-        models.UniqueConstraint(
-            fields=["name", "measurement_unit"],
-            name="unique_ingredient_measurement_unit",
-        )
-    ]
 
     class Meta:
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"],
+                name="unique_ingredient_measurement_unit",
+            )
+        ]
 
     def __str__(self):
         return self.name[:LENGTH_TO_DISPLAY]
@@ -208,3 +275,217 @@ class ShoppingCart(UserRecipeBase):
                 fields=["user", "recipe"], name="unique_recipe_in_cart"
             )
         ]
+
+
+class ShoppingListQuerySet(models.QuerySet):
+    """Поддержка материализованного списка покупок."""
+
+    def calculate(self, **filters):
+        """Считает суммы ингредиентов в корзинах пользователей."""
+        totals = (
+            IngredientRecipe.objects.filter(**filters)
+            .values("ingredient", user=F("recipe__shoppingcart__user"))
+            .annotate(total=Sum("amount"))
+            .order_by()
+        )
+        return (
+            self.model(
+                user_id=row["user"],
+                ingredient_id=row["ingredient"],
+                amount=row["total"],
+            )
+            for row in totals
+        )
+
+    def refresh(self, user_ids, ingredient_ids):
+        """Пересчитывает позиции пользователей по указанным ингредиентам."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        with transaction.atomic():
+            # Блокировка пользователей не даёт двум запросам пересобирать
+            # одни и те же позиции одновременно
+            list(
+                User.objects.select_for_update()
+                .filter(pk__in=user_ids)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            self.filter(
+                user_id__in=user_ids, ingredient_id__in=ingredient_ids
+            ).delete()
+            self.bulk_create(self.calculate(
+                recipe__shoppingcart__user_id__in=user_ids,
+                ingredient_id__in=ingredient_ids,
+            ))
+
+    def rebuild(self):
+        """Полностью пересобирает списки покупок всех пользователей."""
+        with transaction.atomic():
+            self.all().delete()
+            return len(self.bulk_create(
+                self.calculate(recipe__shoppingcart__isnull=False),
+                batch_size=1000,
+            ))
+
+
+class ShoppingListItem(models.Model):
+    """Суммарное количество ингредиента в списке покупок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        related_name="shopping_list",
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        verbose_name="Ингредиент",
+    )
+    amount = models.PositiveIntegerField("Количество")
+
+    objects = ShoppingListQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Позиции списка покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_shopping_list_ingredient",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.ingredient}"[:LENGTH_TO_DISPLAY]
+
+
+class FeedQuerySet(models.QuerySet):
+    """Лента новых рецептов авторов, на которых подписан пользователь.
+
+    Записи раскладываются по лентам подписчиков при публикации рецепта,
+    поэтому чтение ленты — один проход по индексу (user, pub_date).
+    """
+
+    def fan_out(self, recipe):
+        """Добавляет новый рецепт в ленты подписчиков автора."""
+        followers = User.objects.filter(
+            subscriptions__subscribed_to=recipe.author_id
+        )
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id,
+                    recipe_id=recipe.pk,
+                    author_id=recipe.author_id,
+                    pub_date=recipe.pub_date,
+                )
+                for user_id in followers.values_list("pk", flat=True)
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        self.prune(followers)
+
+    def backfill(self, user_id, author_ids):
+        """Добавляет в ленту пользователя рецепты новых авторов."""
+        recipes = (
+            Recipe.objects.filter(author_id__in=author_ids)
+            .order_by("-pub_date", "-id")
+            .values_list("pk", "author_id", "pub_date")[:FEED_MAX_ENTRIES]
+        )
+        self.bulk_create(
+            (
+                self.model(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for recipe_id, author_id, pub_date in recipes
+            ),
+            ignore_conflicts=True,
+        )
+        self.prune(User.objects.filter(pk=user_id))
+
+    def prune(self, users):
+        """Оставляет в лентах users не больше FEED_MAX_ENTRIES записей.
+
+        Лишние записи удаляются одним запросом с ROW_NUMBER(): ORM этой
+        версии Django не умеет фильтровать по оконной функции.
+        """
+        users_sql, users_params = users.values("pk").query.sql_with_params()
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id IN (SELECT id FROM ("
+                f"SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id"
+                f" ORDER BY pub_date DESC, recipe_id DESC) AS position"
+                f" FROM {table} WHERE user_id IN ({users_sql})) ranked"
+                f" WHERE position > %s)",
+                [*users_params, FEED_MAX_ENTRIES],
+            )
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        related_name="feed",
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+        verbose_name="Рецепт",
+    )
+    author = models.ForeignKey(
+        User,
+        related_name="+",
+        on_delete=models.CASCADE,
+        verbose_name="Автор",
+    )
+    # Копия Recipe.pub_date, чтобы лента читалась без соединения таблиц
+    pub_date = models.DateTimeField("Дата публикации")
+
+    objects = FeedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="unique_feed_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-recipe"],
+                name="feed_user_pub_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.recipe}"[:LENGTH_TO_DISPLAY]
+
+
+class StoredFile(models.Model):
+    """Количество ссылок на файл хранилища с именами по хешу содержимого.
+
+    Одинаковые загрузки хранятся одним файлом, который удаляется, когда
+    на него не остаётся ссылок (см. foodgram_backend.storage).
+    """
+
+    name = models.CharField("Имя файла", max_length=255, unique=True)
+    references = models.PositiveIntegerField("Количество ссылок", default=0)
+
+    class Meta:
+        verbose_name = "Файл"
+        verbose_name_plural = "Файлы"
+
+    def __str__(self):
+        return f"{self.name}: {self.references}"
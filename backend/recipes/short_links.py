@@ -0,0 +1,28 @@
+import string
+
+from constants.recipes_constants import (SHORT_LINK_LENGTH,
+                                         SHORT_LINK_MULTIPLIER)
+
+# Первый символ — заглавная буква: старые ссылки из uuid4 состоят только из
+# строчных шестнадцатеричных символов и с новыми не пересекаются
+FIRST_ALPHABET = string.ascii_uppercase
+ALPHABET = string.digits + string.ascii_letters
+SHORT_LINK_SPACE = len(FIRST_ALPHABET) * len(ALPHABET) ** (
+    SHORT_LINK_LENGTH - 1
+)
+
+
+def encode_short_link(pk):
+    """Короткая ссылка рецепта, однозначно вычисляемая по его id.
+
+    Умножение на взаимно простое число по модулю — перестановка, поэтому
+    ссылки не повторяются, пока id меньше SHORT_LINK_SPACE, и при этом не
+    идут подряд.
+    """
+    value = pk * SHORT_LINK_MULTIPLIER % SHORT_LINK_SPACE
+    chars = []
+    for _ in range(SHORT_LINK_LENGTH - 1):
+        value, index = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[index])
+    chars.append(FIRST_ALPHABET[value])
+    return "".join(reversed(chars))
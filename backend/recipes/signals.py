@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.models import (Favorite, FeedEntry, IngredientRecipe, Recipe,
+                            ShoppingCart, ShoppingListItem)
+from users.models import Subscription
+
+User = get_user_model()
+
+# Пакетные операции (api/batch.py) сами обновляют счётчики, списки покупок
+# и ленты одним запросом на всю пачку вместо обработчика на каждую строку
+_signals_deferred = ContextVar("signals_deferred", default=False)
+
+
+@contextmanager
+def deferred_signals():
+    """Отключает обработчики Избранного, корзины и подписок."""
+    token = _signals_deferred.set(True)
+    try:
+        yield
+    finally:
+        _signals_deferred.reset(token)
+
+
+def signals_deferred():
+    return _signals_deferred.get()
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик рецептов автора."""
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F("recipes_count") + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(sender, instance, **kwargs):
+    """Уменьшает счётчик рецептов автора."""
+    User.objects.filter(pk=instance.author_id, recipes_count__gt=0).update(
+        recipes_count=F("recipes_count") - 1
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def increase_favorites_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик добавлений рецепта в Избранное."""
+    if signals_deferred():
+        return
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F("favorites_count") + 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def decrease_favorites_count(sender, instance, **kwargs):
+    """Уменьшает счётчик добавлений рецепта в Избранное."""
+    if signals_deferred():
+        return
+    Recipe.objects.filter(
+        pk=instance.recipe_id, favorites_count__gt=0
+    ).update(favorites_count=F("favorites_count") - 1)
+
+
+def refresh_cart_recipe(cart_item):
+    """Пересчитывает позиции списка покупок по ингредиентам рецепта."""
+    ShoppingListItem.objects.refresh(
+        [cart_item.user_id],
+        IngredientRecipe.objects.filter(
+            recipe_id=cart_item.recipe_id
+        ).values("ingredient"),
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок."""
+    if signals_deferred():
+        return
+    if created:
+        refresh_cart_recipe(instance)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    """Убирает ингредиенты рецепта из списка покупок."""
+    if signals_deferred():
+        return
+    refresh_cart_recipe(instance)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_carts(sender, instance, **kwargs):
+    """Запоминает, чьи списки покупок затронет удаление рецепта."""
+    instance.cart_user_ids = list(
+        ShoppingCart.objects.filter(recipe=instance).values_list(
+            "user", flat=True
+        )
+    )
+    if instance.cart_user_ids:
+        instance.cart_ingredient_ids = list(
+            instance.recipe_ingredients.values_list("ingredient", flat=True)
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def refresh_recipe_carts(sender, instance, **kwargs):
+    """Пересчитывает списки покупок после удаления рецепта."""
+    if getattr(instance, "cart_user_ids", None):
+        ShoppingListItem.objects.refresh(
+            instance.cart_user_ids, instance.cart_ingredient_ids
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def add_to_feeds(sender, instance, created, **kwargs):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    if created:
+        FeedEntry.objects.fan_out(instance)
+
+
+@receiver(post_save, sender=Subscription)
+def fill_feed(sender, instance, created, **kwargs):
+    """Добавляет в ленту рецепты автора, на которого подписались."""
+    if signals_deferred():
+        return
+    if created:
+        FeedEntry.objects.backfill(
+            instance.user_id, [instance.subscribed_to_id]
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def clear_feed(sender, instance, **kwargs):
+    """Убирает из ленты рецепты автора, от которого отписались."""
+    if signals_deferred():
+        return
+    FeedEntry.objects.filter(
+        user_id=instance.user_id, author_id=instance.subscribed_to_id
+    ).delete()
@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from constants.image_constants import (THUMBNAIL_EXTENSION, THUMBNAIL_FORMAT,
+                                       THUMBNAIL_QUALITY, THUMBNAIL_SIZES,
+                                       THUMBNAIL_WORKERS)
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Пул потоков создаётся при первой задаче, уже в процессе воркера."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=THUMBNAIL_WORKERS,
+                thread_name_prefix="thumbnails",
+            )
+    return _executor
+
+
+def thumbnail_name(image_name, width):
+    name = os.path.splitext(os.path.basename(image_name))[0]
+    return f"recipes/thumbnails/{name}_{width}.{THUMBNAIL_EXTENSION}"
+
+
+def resize(image, width):
+    """Уменьшает изображение до ширины width с сохранением пропорций."""
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def make_thumbnails(recipe_id, image_name):
+    """Создаёт миниатюры картинки рецепта и записывает их в рецепт.
+
+    Рецепт обновляется, только если картинка не сменилась за время
+    нарезки; updated_at сдвигается, чтобы сбросить кеш представления.
+    """
+    storage = Recipe._meta.get_field("image").storage
+    with storage.open(image_name) as file:
+        image = Image.open(file)
+        image.load()
+    image = image.convert(
+        "RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB"
+    )
+    thumbnails = {}
+    for field, width in THUMBNAIL_SIZES:
+        buffer = BytesIO()
+        resize(image, width).save(
+            buffer, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY
+        )
+        thumbnails[field] = storage.save(
+            thumbnail_name(image_name, width), ContentFile(buffer.getvalue())
+        )
+    updated = Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+        updated_at=timezone.now(), **thumbnails
+    )
+    if not updated:
+        for name in thumbnails.values():
+            storage.delete(name)
+
+
+def run_make_thumbnails(recipe_id, image_name):
+    try:
+        make_thumbnails(recipe_id, image_name)
+    except Exception:
+        logger.exception(
+            "Не удалось создать миниатюры рецепта %s", recipe_id
+        )
+    finally:
+        # У каждого потока своё соединение с базой
+        connection.close()
+
+
+def schedule_thumbnails(recipe):
+    """Ставит нарезку миниатюр в очередь после фиксации транзакции."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(
+            run_make_thumbnails, recipe_id, image_name
+        )
+    )
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.models import Favorite, ShoppingCart
 from users.models import FoodgramUser, Subscription
 
 
@@ -31,19 +31,12 @@ class UserAdmin(BaseUserAdmin):
         "last_name",
         "email",
         "recipes_count",
-        "subscriptions_count",
+        "subscribers_count",
     )
     search_fields = ("username", "email")
+    readonly_fields = ("recipes_count", "subscribers_count")
     inlines = (SubscriptionInline, FavoriteInline, ShoppingCartInline)
 
-    @admin.display(description="Количество рецептов")
-    def recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
-
-    @admin.display(description="Количество подписчиков")
-    def subscriptions_count(self, obj):
-        return obj.subscribers.count()
-
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
@@ -27,6 +27,12 @@ class FoodgramUser(AbstractUser):
         default="",
         verbose_name="Аватар",
     )
+    recipes_count = models.PositiveIntegerField(
+        "Количество рецептов", default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0, editable=False
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
@@ -0,0 +1,27 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.signals import signals_deferred
+from users.models import FoodgramUser, Subscription
+
+
+@receiver(post_save, sender=Subscription)
+def increase_subscribers_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик подписчиков автора."""
+    if signals_deferred():
+        return
+    if created:
+        FoodgramUser.objects.filter(pk=instance.subscribed_to_id).update(
+            subscribers_count=F("subscribers_count") + 1
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def decrease_subscribers_count(sender, instance, **kwargs):
+    """Уменьшает счётчик подписчиков автора."""
+    if signals_deferred():
+        return
+    FoodgramUser.objects.filter(
+        pk=instance.subscribed_to_id, subscribers_count__gt=0
+    ).update(subscribers_count=F("subscribers_count") - 1)